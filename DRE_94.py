@@ -25,20 +25,55 @@
 #       split_encrypt: 1.0521080493927002 sec
 
 
+import functools as _functools
+import numbers as _numbers
 import time as _time
+import zlib as _zlib
 
 from implicit import (
-    driver_cwd as _driver_cwd, 
+    resolve_path as _resolve_path,
     arg_check as _arg_check, 
     shuffle_base11 as _shuffle_base11, 
     key_error_check as _key_error_check, 
+    version_check as _version_check,
+    compression_check as _compression_check,
     shuffle as _shuffle
 )
 from radix import (
     baseN_to_base10 as _baseN_to_base10, 
     base10_to_baseN as _base10_to_baseN,
+    digits_to_base10 as _digits_to_base10,
+    base10_to_digits as _base10_to_digits,
 )
-from global_constants import KEY_CHARSET, KEY_LENGTH, PRINTABLE_ASCII, M512, NULL_CHAR
+from global_constants import (
+    KEY_CHARSET, KEY_CHARSET_SET, KEY_LENGTH, PRINTABLE_ASCII, NUMERIC_CHARSET, DECIMAL_DIGITS, M512, NULL_CHAR,
+    ORD_BITS, COMPRESSION_FLAGS, COMPRESSION_MASK
+)
+
+# ASCII mode plaintexts and ciphers at least this long are converted with NumPy (if installed) rather than with
+# bytes.translate; NumPy's fixed cost per call only pays off on a few thousand characters (re-measure the crossover
+# with benchmark.ascii_threshold_report)
+NUMPY_THRESHOLD = 3000
+
+# Error message of ASCII mode for plaintexts with characters outside the symbol set
+ASCII_PLAINTEXT_MSG = 'plaintext characters must be printable ASCII (codes 9-13, 32-126)'
+
+# encrypt_ASCII_many/decrypt_ASCII_many convert short items with NumPy (if installed) once there are this many
+NUMPY_BATCH_THRESHOLD = 64
+
+# NumPy conversions group digits into chunks of this many, so that every chunk fits in a 64-bit integer
+# (101 ** 9 < 2 ** 63, and 94 ** 9 < 2 ** 63); ASCII mode plaintexts and ciphers up to this length are short, and
+# their whole conversion is done on machine-sized integers
+CHUNK_DIGITS = 9
+
+
+# NumPy is optional and only imported when first needed (it is slow to import); returns None if it is not installed
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
 
 
 def hash_seed(seed, size, base=M512):
@@ -101,16 +136,19 @@ def generate_key(seed=None):
     return ''.join(key)
 
 
-def load_plaintext(text_source, fromfile):
+# With fromfile=True, a relative path is resolved against 'base_dir' (str or pathlib.Path) if given, else against the
+# directory of the driver script
+def load_plaintext(text_source, fromfile, base_dir=None):
     _arg_check(fromfile, 'fromfile', bool)
 
     if fromfile:
         # If filename, get text from file
+        path = _resolve_path(text_source, base_dir)
         try:
-            text_file = open(_driver_cwd(text_source))
-            plaintext = text_file.read()
+            with open(path) as text_file:
+                plaintext = text_file.read()
         except UnicodeDecodeError as e:
-            msg = f'{e.args[4]}\n{" " * 20}(could not read text from file: {_driver_cwd(text_source)})'
+            msg = f'{e.args[4]}\n{" " * 20}(could not read text from file: {path})'
             raise UnicodeDecodeError(*e.args[:4], msg)
 
     else:
@@ -120,41 +158,200 @@ def load_plaintext(text_source, fromfile):
     return plaintext
 
 
-def load_ciphertext(text_source, fromfile):
+def load_ciphertext(text_source, fromfile, base_dir=None):
     _arg_check(fromfile, 'fromfile', bool)
 
     # Determine if cipher source is filename or raw cipher
     if fromfile:
         # If filename, get cipher from text file
+        path = _resolve_path(text_source, base_dir)
         try:
-            cipher_file = open(_driver_cwd(text_source), 'r')
-            ciphertext = cipher_file.read().replace('\n', '').replace('\t', '').replace(' ', '')  # ignore whitespace
-            cipher_file.close()
+            with open(path, 'r') as cipher_file:
+                ciphertext = cipher_file.read().replace('\n', '').replace('\t', '').replace(' ', '')  # ignore whitespace
         except UnicodeDecodeError as e:
-            msg = f'{e.args[4]}\n{" " * 20}(could not read text from file: {_driver_cwd(text_source)})'
+            msg = f'{e.args[4]}\n{" " * 20}(could not read text from file: {path})'
             raise UnicodeDecodeError(*e.args[:4], msg)
 
     else:
         ciphertext = text_source
 
-    for ch in ciphertext:
-        if ch not in KEY_CHARSET:
-            msg = 'invalid DRE.94 cipher; all characters must be from set of ASCII codes 33 to 126'
-            raise ValueError(msg)
+    if not KEY_CHARSET_SET.issuperset(ciphertext):
+        msg = 'invalid DRE.94 cipher; all characters must be from set of ASCII codes 33 to 126'
+        raise ValueError(msg)
 
     return ciphertext
 
 
+# Header of version 2+ ciphers, stored in the lowest bits of the base-10 cipher so that it can be read back from a
+# small mask of the integer: 4 bits of version, 4 bits of flags, then 'field' (the size of the tag) as a varint of
+# 7-bit groups, each with a continuation bit. Returns the header and its size in bits
+def _pack_header(version, flags, field):
+    header = version | (flags << 4)
+    shift = 8
+    while True:
+        group = field & 0x7F
+        field >>= 7
+        header |= (group | (0x80 if field else 0)) << shift
+        shift += 8
+        if not field:
+            return header, shift
+
+
+# Reads back the header of a version 2+ cipher; returns version, flags, field and the size of the header in bits
+def _unpack_header(base10_cipher):
+    low = base10_cipher & ((1 << 64) - 1)  # header never exceeds 64 bits; masking avoids touching the whole integer
+    version = low & 0xF
+    flags = (low >> 4) & 0xF
+
+    field = 0
+    shift = 8
+    while True:
+        group = (low >> shift) & 0xFF
+        field |= (group & 0x7F) << (7 * ((shift - 8) // 8))
+        shift += 8
+        if not group & 0x80:
+            return version, flags, field, shift
+        if shift >= 64:
+            msg = 'invalid DRE.94 cipher; malformed header (wrong key or version?)'
+            raise ValueError(msg)
+
+
+# Packs tag and message portions of a version 2+ cipher into one base-10 integer, tag and header in the lowest bits
+# so that decryption can separate them with bit masks and shifts instead of converting the cipher to a string
+def _pack_cipher(base10_cipher_no_tag, tag, tag_bits, version, flags, field):
+    header, header_bits = _pack_header(version, flags, field)
+    return (base10_cipher_no_tag << (header_bits + tag_bits)) | (tag << header_bits) | header
+
+
+# Separates the tag and message portions of a version 2+ cipher; the header must match the expected version
+def _unpack_cipher(base10_cipher, version, tag_size):
+    cipher_version, flags, field, header_bits = _unpack_header(base10_cipher)
+    if cipher_version != version:
+        msg = f'cipher is not a version {version} DRE.94 cipher (wrong key or version?)'
+        raise ValueError(msg)
+
+    # A wrong key can yield a huge tag size, which must be rejected before any mask of that size is built
+    tag_bits = tag_size(field)
+    if header_bits + tag_bits > base10_cipher.bit_length():
+        msg = 'invalid DRE.94 cipher; malformed header (wrong key or version?)'
+        raise ValueError(msg)
+
+    tag =(base10_cipher & ((1 << (header_bits + tag_bits)) - 1)) >> header_bits
+    base10_cipher_no_tag = base10_cipher >> (header_bits + tag_bits)
+
+    return base10_cipher_no_tag, tag, flags, field
+
+
+# Version 2 tag: ords of charset in fixed-width fields of ORD_BITS bits each, first ord in the lowest field
+def _encode_tag_v2(charset):
+    if not charset:
+        return 0, 0, 0
+
+    tag = int(''.join(format(ord(ch), f'0{ORD_BITS}b') for ch in reversed(charset)), 2)
+    return tag, ORD_BITS * len(charset), len(charset)
+
+
+def _decode_tag_v2(tag, count):
+    bits = format(tag, f'0{ORD_BITS * count}b') if count else ''
+    return [chr(int(bits[i:i + ORD_BITS], 2)) for i in range(len(bits) - ORD_BITS, -1, -ORD_BITS)]
+
+
+# Version 3 tag: set of charset ords, sorted and delta-encoded with Elias gamma codes (deltas are small for most
+# text, so this is far denser than fixed-width ords); a leading 1 bit keeps leading zero bits from vanishing
+def _encode_tag_v3(charset):
+    ords = sorted(ord(ch) for ch in charset)
+
+    codes = ['1']
+    previous = 0
+    for code_point in ords:
+        delta = format(code_point - previous, 'b')  # delta >= 1, since the null char (ord 0) is never in charset
+        codes.append('0' * (len(delta) - 1) + delta)
+        previous = code_point
+
+    bits = ''.join(codes)
+    return int(bits, 2), len(bits)
+
+
+def _decode_tag_v3(tag):
+    bits = format(tag, 'b')[1:]  # drop leading 1 bit
+
+    charset = []
+    code_point = 0
+    pos = 0
+    while pos < len(bits):
+        # Number of leading zeros gives the number of bits in the delta after its leading 1 bit
+        one = bits.find('1', pos)
+        if one == -1:
+            msg = 'invalid DRE.94 cipher; malformed charset tag (wrong key or version?)'
+            raise ValueError(msg)
+
+        end = one + (one - pos) + 1
+        code_point += int(bits[one:end], 2)
+        charset.append(chr(code_point))
+        pos = end
+
+    return charset
+
+
+# Compresses plaintext (as UTF-8; surrogatepass lets lone surrogates through, as in uncompressed plaintext)
+def _compress(plaintext, compress, level):
+    data = plaintext.encode('utf-8', 'surrogatepass')
+
+    if compress == 'zlib':
+        return _zlib.compress(data, -1 if level is None else level)
+
+    # lzma is imported on first use, since most callers never need it
+    import lzma
+    return lzma.compress(data, preset=level)
+
+
+def _decompress(data, flags):
+    msg = 'invalid DRE.94 cipher; compressed plaintext is corrupt (wrong key?)'
+
+    if flags & COMPRESSION_FLAGS['zlib']:
+        try:
+            data = _zlib.decompress(data)
+        except _zlib.error:
+            raise ValueError(msg)
+
+    else:
+        import lzma
+        try:
+            data = lzma.decompress(data)
+        except lzma.LZMAError:
+            raise ValueError(msg)
+
+    return data.decode('utf-8', 'surrogatepass')
+
+
 # Encrypts string with arbitrary character encoding into ASCII ciphertext
-def encrypt(text_source, key, fromfile=False):
-    """Encrypts string with arbitrary character encoding into ASCII ciphertext (using a DRE.94 key)."""
+def encrypt(text_source, key, fromfile=False, version=1, compress=None, level=None, base_dir=None,
+            workers=None):
+    """Encrypts string with arbitrary character encoding into ASCII ciphertext (using a DRE.94 key). Version 2
+    ciphers carry a binary header and tag, which make decryption cheaper, and version 3 ciphers also carry a much
+    smaller tag; a cipher must be decrypted with the version it was encrypted with. Version 2+ plaintext can be
+    compressed first with compress='zlib' or 'lzma' (optionally at the given compression level). With fromfile=True,
+    a relative path is resolved against 'base_dir' if given, else against the directory of the driver script. With
+    workers > 1 (and the gmpy2 backend), the cipher of a huge plaintext is written out in that many worker
+    processes."""
 
     _key_error_check(key)
+    _version_check(version)
+    _compression_check(compress, level, version)
+    if workers is not None:
+        _arg_check(workers, 'workers', int)
 
-    plaintext = load_plaintext(text_source, fromfile)
+    plaintext = load_plaintext(text_source, fromfile, base_dir)
     if plaintext == '':
         return ''
 
+    # Compressed plaintext is encrypted as bytes (like encrypt_bytes), with the compression method in the header
+    # flags; the null char restriction and the tag do not apply
+    if compress is not None:
+        compressed = _compress(plaintext, compress, level)
+        base10_cipher = _pack_cipher(_bytes_to_base10(compressed, key), 0, 0, version, COMPRESSION_FLAGS[compress], 0)
+        return _base10_to_baseN(base10_cipher, key, workers)
+
     # Ensures plaintext never starts with 0th digit; null character is used as dummy 0th digit in charset.
     # The null character can be encrypted, but it can not be the leading character in plaintext because
     # it is set as the 0th digit for all ciphers, and leading zero digits vanish upon decryption
@@ -163,11 +360,15 @@ def encrypt(text_source, key, fromfile=False):
         raise ValueError(msg)
 
     # Get set of distinct chars in plaintext to be used as digits (numbering system)
-    # (not using set() b/c it's inconsistent)
-    charset = []
-    for ch in plaintext:
-        if ch not in charset:
-            charset.append(ch)
+    # (not using set() b/c it's inconsistent; version 3 sorts it, so that the tag only needs to record the set,
+    # and drops the null char before shuffling, so that decryption can shuffle the same set)
+    if version >= 3:
+        charset = sorted(set(plaintext) - {NULL_CHAR})
+    else:
+        charset = []
+        for ch in plaintext:
+            if ch not in charset:
+                charset.append(ch)
 
     # Shuffle charset (symbol set) to prevent one-to-one char comparison between
     # ciphers that used different keys but same plaintext
@@ -183,81 +384,448 @@ def encrypt(text_source, key, fromfile=False):
     #   - hence, initial null char in charset ensures no leading zero digits in plaintext
     base10_cipher_no_tag = _baseN_to_base10(plaintext, [NULL_CHAR] + charset)
 
-    # Tag contains ords of charset (lengthens cipher, but necessary for arbitrary character encoding)
-    tag = ' '.join(str(ord(ch)) for ch in charset)  # tag is in base-11 (0123456789 + SPACE)
+    if version == 1:
+        # Tag contains ords of charset (lengthens cipher, but necessary for arbitrary character encoding)
+        tag = ' '.join(str(ord(ch)) for ch in charset)  # tag is in base-11 (0123456789 + SPACE)
+
+        # Get shuffled base-11 symbol set with key as seed (shuffled to further obscure cipher)
+        base11_symbols = _shuffle_base11(key)
 
-    # Get shuffled base-11 symbol set with key as seed (shuffled to further obscure cipher)
-    base11_symbols = _shuffle_base11(key)
+        # Combine base-11 tag and base-10 cipher, get full base-11 cipher; then convert full base-11 cipher to
+        # base-10 (decimal digits are written with radix, since str() of a huge int is limited in Python 3.11+)
+        base11_cipher = f'{tag} {_base10_to_baseN(base10_cipher_no_tag, DECIMAL_DIGITS, workers)}'
+        base10_cipher = _baseN_to_base10(base11_cipher, base11_symbols)
 
-    # Combine base-11 tag and base-10 cipher, get full base-11 cipher; then convert full base-11 cipher to base-10
-    base11_cipher = f'{tag} {base10_cipher_no_tag}'
-    base10_cipher = _baseN_to_base10(base11_cipher, base11_symbols)
+    elif version == 2:
+        # Tag and its size are packed into the integer in binary, so no decimal string is ever built
+        tag, tag_bits, count = _encode_tag_v2(charset)
+        base10_cipher = _pack_cipher(base10_cipher_no_tag, tag, tag_bits, version, 0, count)
+
+    else:
+        # Same as version 2, but with the compact tag (its size is recorded in bits)
+        tag, tag_bits = _encode_tag_v3(charset)
+        base10_cipher = _pack_cipher(base10_cipher_no_tag, tag, tag_bits, version, 0, tag_bits)
 
     # Finally, convert full base-10 cipher to base-94 with key
-    cipher = _base10_to_baseN(base10_cipher, key)
+    cipher = _base10_to_baseN(base10_cipher, key, workers)
 
     return cipher
 
 
 # Decrypts ASCII ciphertext into plaintext with arbitrary character encoding
-def decrypt(cipher_source, key, fromfile=False):
-    """Decrypts ASCII ciphertext into plaintext with arbitrary character encoding (using a DRE.94 key)."""
+def decrypt(cipher_source, key, fromfile=False, version=1, base_dir=None, workers=None):
+    """Decrypts ASCII ciphertext into plaintext with arbitrary character encoding (using a DRE.94 key). The
+    version must be the one the cipher was encrypted with; compressed ciphers are decompressed automatically. With
+    fromfile=True, a relative path is resolved against 'base_dir' if given, else against the driver script's
+    directory. With workers > 1 (and the gmpy2 backend), the plaintext of a huge cipher is written out in that many
+    worker processes."""
 
     _key_error_check(key)
+    _version_check(version)
+    if workers is not None:
+        _arg_check(workers, 'workers', int)
 
-    cipher = load_ciphertext(cipher_source, fromfile)
+    cipher = load_ciphertext(cipher_source, fromfile, base_dir)
     if cipher == '':
         return ''
 
     # Convert base-94 cipher to base-10 integer using key
     base10_cipher = _baseN_to_base10(cipher, key)
 
-    # Get shuffled base-11 symbol set with key as seed
-    base11_symbols = _shuffle_base11(key)
+    if version == 1:
+        # Get shuffled base-11 symbol set with key as seed
+        base11_symbols = _shuffle_base11(key)
 
-    # Convert base-10 cipher to base-11 cipher to get the tag and message portions of the cipher
-    base11_cipher = _base10_to_baseN(base10_cipher, base11_symbols)
+        # Convert base-10 cipher to base-11 cipher to get the tag and message portions of the cipher
+        base11_cipher = _base10_to_baseN(base10_cipher, base11_symbols, workers)
 
-    # Separate tag and message portions of the cipher
-    base11_cipher_split = base11_cipher.split()
-    tag_list = base11_cipher_split[:-1]
-    base10_cipher_no_tag = int(base11_cipher_split[-1])
+        # Separate tag and message portions of the cipher
+        base11_cipher_split = base11_cipher.split()
+        tag_list = base11_cipher_split[:-1]
+        base10_cipher_no_tag = _baseN_to_base10(base11_cipher_split[-1], DECIMAL_DIGITS)
 
-    # From tag, get ords of plaintext charset, then build charset with ords
-    ords = map(int, tag_list)
-    charset = [chr(i) for i in ords]
+        # From tag, get ords of plaintext charset, then build charset with ords
+        ords = map(int, tag_list)
+        charset = [chr(i) for i in ords]
+
+    else:
+        # Separate tag and message portions of the cipher with bit operations (the header's field is the number of
+        # ords in version 2 tags, and the size of the tag in bits in version 3 tags)
+        tag_size = (lambda count: ORD_BITS * count) if version == 2 else (lambda tag_bits: tag_bits)
+        base10_cipher_no_tag, tag, flags, field = _unpack_cipher(base10_cipher, version, tag_size)
+
+        # Compressed plaintext was encrypted as bytes, without a tag
+        if flags & COMPRESSION_MASK:
+            return _decompress(_base10_to_bytes(base10_cipher_no_tag, key), flags)
+
+        if version == 2:
+            # Read ords of charset from tag
+            charset = _decode_tag_v2(tag, field)
+        else:
+            # Tag only records the set of chars (sorted), so the charset is shuffled again with key as seed
+            charset = _shuffle(_decode_tag_v3(tag), key)
 
     # Get plaintext (base-N text) using charset which was derived earlier
-    plaintext = _base10_to_baseN(base10_cipher_no_tag, [NULL_CHAR] + charset)
+    plaintext = _base10_to_baseN(base10_cipher_no_tag, [NULL_CHAR] + charset, workers)
 
     return plaintext
 
 
+# The header of a version 2+ cipher lies in the lowest 64 bits of its base-10 integer, which only depend on the last 64
+# base-94 digits (94 ** i is a multiple of 2 ** 64 for i >= 64), so the rest of the cipher is never converted
+def cipher_compression(cipher, key, version=2):
+    """Returns the compression method ('zlib' or 'lzma') a cipher was encrypted with, or None if it is not compressed
+    (version 1 ciphers never are); reads only the cipher's header."""
+
+    _key_error_check(key)
+    _version_check(version)
+    _arg_check(cipher, 'cipher', str)
+
+    if version == 1 or cipher == '':
+        return None
+
+    cipher_version, flags, _, _ = _unpack_header(_baseN_to_base10(cipher[-64:], key))
+    if cipher_version != version:
+        msg = f'cipher is not a version {version} DRE.94 cipher (wrong key or version?)'
+        raise ValueError(msg)
+
+    for method, flag in COMPRESSION_FLAGS.items():
+        if flags & flag:
+            return method
+    return None
+
+
+# Builds the byte translation tables of ASCII mode for a key: byte value -> digit of the plaintext charset (255 if
+# not printable ASCII), digit -> byte of the plaintext charset, byte value -> digit of the key (255 if not in the
+# key), and digit -> byte of the key; the plaintext charset is the null char followed by the shuffled ASCII symbol set
+@_functools.lru_cache(maxsize=64)
+def _ascii_translation(key):
+    charset = (NULL_CHAR + ''.join(_shuffle(PRINTABLE_ASCII, key))).encode('ascii')
+    symbols = key.encode('ascii')
+
+    plain_digits = bytearray(b'\xff' * 256)
+    for digit, byte in enumerate(charset[1:], 1):  # null char is not allowed in plaintext
+        plain_digits[byte] = digit
+    key_digits = bytearray(b'\xff' * 256)
+    for digit, byte in enumerate(symbols):
+        key_digits[byte] = digit
+
+    # Digit tables are padded to 256 entries, as bytes.translate requires
+    plain_symbols = charset.ljust(256, b'\0')
+    key_symbols = symbols.ljust(256, b'\0')
+
+    return bytes(plain_digits), plain_symbols, bytes(key_digits), key_symbols
+
+
+# NumPy versions of the tables of _ascii_translation (digit -> byte tables are cut to the size of the base)
+@_functools.lru_cache(maxsize=64)
+def _ascii_arrays(key):
+    np = _numpy()
+    plain_digits, plain_symbols, key_digits, key_symbols = _ascii_translation(key)
+
+    plain_symbols = plain_symbols[:len(PRINTABLE_ASCII) + 1]
+    key_symbols = key_symbols[:KEY_LENGTH]
+    tables = (plain_digits, plain_symbols, key_digits, key_symbols)
+    return tuple(np.frombuffer(table, dtype=np.uint8) for table in tables)
+
+
+# Converts an array of digits (most significant first) to base-10 integer: chunks of CHUNK_DIGITS digits are
+# evaluated at once in 64-bit integers, then combined by radix in base ** CHUNK_DIGITS
+def _digit_array_to_base10(np, digits, base):
+    padded = np.zeros(-len(digits) % CHUNK_DIGITS + len(digits), dtype=np.int64)
+    padded[len(padded) - len(digits):] = digits
+    weights = base ** np.arange(CHUNK_DIGITS - 1, -1, -1, dtype=np.int64)
+    return _digits_to_base10((padded.reshape(-1, CHUNK_DIGITS) @ weights).tolist(), base ** CHUNK_DIGITS)
+
+
+# Converts positive base-10 integer to an array of digits (most significant first, no leading zeros); the inverse
+# of _digit_array_to_base10
+def _base10_to_digit_array(np, integer, base):
+    chunks = np.array(_base10_to_digits(integer, base ** CHUNK_DIGITS), dtype=np.int64)
+    weights = base ** np.arange(CHUNK_DIGITS - 1, -1, -1, dtype=np.int64)
+    digits = ((chunks[:, None] // weights) % base).ravel()
+    return digits[np.flatnonzero(digits)[0]:]
+
+
+# Same as encrypt_ASCII on a (long) loaded plaintext, with the per-character work vectorised by NumPy
+def _encrypt_ASCII_numpy(np, plaintext, key):
+    plain_digits, _, _, key_symbols = _ascii_arrays(key)
+
+    # Map every character to its digit, marking characters that are not printable ASCII with 255
+    try:
+        digits = plain_digits[np.frombuffer(plaintext.encode('ascii'), dtype=np.uint8)]
+    except UnicodeEncodeError:
+        digits = None
+    if digits is None or (digits == 255).any():
+        raise ValueError(ASCII_PLAINTEXT_MSG)
+
+    base10_cipher = _digit_array_to_base10(np, digits, len(PRINTABLE_ASCII) + 1)
+    return key_symbols[_base10_to_digit_array(np, base10_cipher, KEY_LENGTH)].tobytes().decode('ascii')
+
+
+# Same as decrypt_ASCII on a (long) loaded cipher, with the per-character work vectorised by NumPy
+def _decrypt_ASCII_numpy(np, cipher, key):
+    _, plain_symbols, key_digits, _ = _ascii_arrays(key)
+
+    # Cipher characters were validated upon loading, and every key contains all of them
+    digits = key_digits[np.frombuffer(cipher.encode('ascii'), dtype=np.uint8)]
+
+    base10_cipher = _digit_array_to_base10(np, digits, KEY_LENGTH)
+    if base10_cipher == 0:
+        return NULL_CHAR  # as in decrypt_ASCII, where 0 converts to the 0th symbol
+
+    plain_digits = _base10_to_digit_array(np, base10_cipher, len(PRINTABLE_ASCII) + 1)
+    return plain_symbols[plain_digits].tobytes().decode('ascii')
+
+
+# Same as encrypt_ASCII on a short loaded plaintext (up to CHUNK_DIGITS characters, so the base-10 cipher is below
+# 2 ** 63), with the byte tables of _ascii_translation
+def _encrypt_ASCII_short(plaintext, key):
+    plain_digits, _, _, key_symbols = _ascii_translation(key)
+    try:
+        digits = plaintext.encode('ascii').translate(plain_digits)
+    except UnicodeEncodeError:
+        digits = b'\xff'
+    if b'\xff' in digits:
+        raise ValueError(ASCII_PLAINTEXT_MSG)
+
+    base10_cipher = 0
+    for digit in digits:
+        base10_cipher = base10_cipher * (len(PRINTABLE_ASCII) + 1) + digit
+
+    cipher = bytearray()
+    while base10_cipher > 0:
+        base10_cipher, digit = divmod(base10_cipher, KEY_LENGTH)
+        cipher.append(digit)
+
+    return bytes(reversed(cipher)).translate(key_symbols).decode('ascii')
+
+
+# Same as decrypt_ASCII on a short loaded cipher (up to CHUNK_DIGITS characters)
+def _decrypt_ASCII_short(cipher, key):
+    _, plain_symbols, key_digits, _ = _ascii_translation(key)
+
+    base10_cipher = 0
+    for digit in cipher.encode('ascii').translate(key_digits):
+        base10_cipher = base10_cipher * KEY_LENGTH + digit
+
+    if base10_cipher == 0:
+        return NULL_CHAR  # as in decrypt_ASCII, where 0 converts to the 0th symbol
+
+    plaintext = bytearray()
+    while base10_cipher > 0:
+        base10_cipher, digit = divmod(base10_cipher, len(PRINTABLE_ASCII) + 1)
+        plaintext.append(digit)
+
+    return bytes(reversed(plaintext)).translate(plain_symbols).decode('ascii')
+
+
+# Maps a list of short strings (up to CHUNK_DIGITS characters) to a matrix of digits with a 256-entry lookup table
+# and evaluates every row at once in 64-bit integers; returns the values, or None if any character is not in the table
+def _short_strings_to_base10(np, strings, table, base):
+    # Lengths are taken from the strings themselves, since NumPy drops trailing null chars
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    codes = np.array(strings, dtype=f'U{CHUNK_DIGITS}').view(np.uint32).reshape(len(strings), CHUNK_DIGITS)
+    digits = np.where(codes < 256, table[codes & 0xFF], 255)
+
+    in_string = np.arange(codes.shape[1]) < lengths[:, None]
+    if (in_string & (digits == 255)).any():
+        return None
+
+    values = np.zeros(len(strings), dtype=np.int64)
+    for i in range(codes.shape[1]):
+        values = np.where(in_string[:, i], values * base + digits[:, i], values)
+    return values
+
+
+# Converts 64-bit values to rows of 'width' symbols (most significant first, leading zeros kept) and returns the rows
+# as ASCII bytes
+def _base10_to_short_strings(np, values, symbols, width):
+    digits = np.empty((len(values), width), dtype=np.int64)
+    for i in range(width - 1, -1, -1):
+        values, digits[:, i] = np.divmod(values, len(symbols))
+    return symbols[digits].tobytes()
+
+
+# Same as encrypt_ASCII for many short loaded plaintexts at once, vectorised by NumPy
+def _encrypt_ASCII_short_numpy(np, plaintexts, key):
+    plain_digits, plain_symbols, _, key_symbols = _ascii_arrays(key)
+
+    values = _short_strings_to_base10(np, plaintexts, plain_digits, len(plain_symbols))
+    if values is None:
+        raise ValueError(ASCII_PLAINTEXT_MSG)
+
+    # 101 ** 9 needs up to 10 base-94 digits; leading zero digits are the key's first character
+    width = CHUNK_DIGITS + 1
+    rows = _base10_to_short_strings(np, values, key_symbols, width).decode('ascii')
+    return [rows[i:i + width].lstrip(key[0]) for i in range(0, len(rows), width)]
+
+
+# Same as decrypt_ASCII for many short loaded ciphers at once, vectorised by NumPy
+def _decrypt_ASCII_short_numpy(np, ciphers, key):
+    _, plain_symbols, key_digits, _ = _ascii_arrays(key)
+
+    values = _short_strings_to_base10(np, ciphers, key_digits, KEY_LENGTH)
+    if values is None:
+        msg = 'invalid DRE.94 cipher; all characters must be from set of ASCII codes 33 to 126'
+        raise ValueError(msg)
+
+    # 94 ** 9 needs up to 9 base-101 digits; leading zero digits are the null char
+    width = CHUNK_DIGITS
+    rows = _base10_to_short_strings(np, values, plain_symbols, width).decode('ascii')
+    return [(rows[i:i + width].lstrip(NULL_CHAR) or NULL_CHAR) if cipher else ''
+            for cipher, i in zip(ciphers, range(0, len(rows), width))]
+
+
+# ASCII mode with bytes.translate (in C) mapping characters to digits and back; used for plaintexts too long for the
+# short path and too short for NumPy to pay off
+def _encrypt_ASCII_translate(plaintext, key):
+    # Map every character to its digit in the shuffled ASCII symbol set with one bytes.translate call (in C), marking
+    # characters that are not printable ASCII with 255. The symbol set is shuffled to prevent one-to-one char
+    # comparison between ciphers that used different keys but same plaintext, and null char is its 0th digit because:
+    #   - leading zero digits in plaintext vanish upon decryption
+    #   - null char is forbidden in plaintext when encrypting
+    #   - hence, initial null char in charset ensures no leading zero digits in plaintext
+    plain_digits, _, _, key_symbols = _ascii_translation(key)
+    try:
+        digits = plaintext.encode('ascii').translate(plain_digits)
+    except UnicodeEncodeError:
+        digits = b'\xff'
+    if b'\xff' in digits:
+        raise ValueError(ASCII_PLAINTEXT_MSG)
+
+    # Convert plaintext digits to base-10 integer (radix works on the bytes directly)
+    base10_cipher = _digits_to_base10(digits, len(PRINTABLE_ASCII) + 1)
+
+    # Finally, convert base-10 cipher to base-94 with key
+    cipher = bytes(_base10_to_digits(base10_cipher, KEY_LENGTH)).translate(key_symbols).decode('ascii')
+
+    return cipher
+
+
+def _decrypt_ASCII_translate(cipher, key):
+    # Convert base-94 cipher to base-10 integer using key (cipher characters were validated upon loading, and every
+    # key contains all of them)
+    _, plain_symbols, key_digits, _ = _ascii_translation(key)
+    base10_cipher = _digits_to_base10(cipher.encode('ascii').translate(key_digits), KEY_LENGTH)
+
+    # Get plaintext (base-101 text) using shuffled ASCII charset
+    plaintext = bytes(_base10_to_digits(base10_cipher, len(PRINTABLE_ASCII) + 1)).translate(plain_symbols)
+
+    return plaintext.decode('ascii')
+
+
 # Encrypts string with ASCII character encoding into ASCII ciphertext
-def encrypt_ASCII(text_source, key, fromfile=False):
+def encrypt_ASCII(text_source, key, fromfile=False, base_dir=None):
     """Encrypts ASCII string into ASCII ciphertext (using a DRE.94 key)."""
 
     _key_error_check(key)
 
-    plaintext = load_plaintext(text_source, fromfile)
+    plaintext = load_plaintext(text_source, fromfile, base_dir)
     if plaintext == '':
         return ''
 
-    # Ensures plaintext is printable ASCII
-    for ch in plaintext:
-        if ch not in PRINTABLE_ASCII:
-            msg = 'plaintext characters must be printable ASCII (codes 9-13, 32-126)'
-            raise ValueError(msg)
+    # Short plaintexts are converted on machine-sized integers
+    if len(plaintext) <= CHUNK_DIGITS:
+        return _encrypt_ASCII_short(plaintext, key)
+
+    # Long plaintexts are converted with NumPy, if installed
+    if len(plaintext) >= NUMPY_THRESHOLD:
+        np = _numpy()
+        if np is not None:
+            return _encrypt_ASCII_numpy(np, plaintext, key)
+
+    return _encrypt_ASCII_translate(plaintext, key)
+
+
+# Decrypts ASCII ciphertext into ASCII plaintext
+def decrypt_ASCII(cipher_source, key, fromfile=False, base_dir=None):
+    """Decrypts ASCII ciphertext into ASCII plaintext (using a DRE.94 key)."""
+
+    _key_error_check(key)
+
+    cipher = load_ciphertext(cipher_source, fromfile, base_dir)
+    if cipher == '':
+        return ''
+
+    # Short ciphers are converted on machine-sized integers
+    if len(cipher) <= CHUNK_DIGITS:
+        return _decrypt_ASCII_short(cipher, key)
+
+    # Long ciphers are converted with NumPy, if installed
+    if len(cipher) >= NUMPY_THRESHOLD:
+        np = _numpy()
+        if np is not None:
+            return _decrypt_ASCII_numpy(np, cipher, key)
+
+    return _decrypt_ASCII_translate(cipher, key)
+
+
+# Encrypts many ASCII strings (e.g. the cells of a column) into ASCII ciphertexts
+def encrypt_ASCII_many(texts, key):
+    """Encrypts an iterable of ASCII strings into a list of ASCII ciphertexts (using a DRE.94 key); same ciphers as
+    encrypt_ASCII on each string. Short strings (up to CHUNK_DIGITS characters, such as codes and IDs) are converted
+    all at once with NumPy if it is installed."""
+
+    _key_error_check(key)
+
+    texts = list(texts)
+    return _map_ASCII_many(texts, key, encrypt_ASCII, _encrypt_ASCII_short_numpy)
+
+
+# Decrypts many ASCII ciphertexts into ASCII plaintexts
+def decrypt_ASCII_many(ciphers, key):
+    """Decrypts an iterable of ASCII ciphertexts into a list of ASCII plaintexts (using a DRE.94 key); same results
+    as decrypt_ASCII on each cipher. Short ciphers are converted all at once with NumPy if it is installed."""
+
+    _key_error_check(key)
+
+    ciphers = list(ciphers)
+    return _map_ASCII_many(ciphers, key, decrypt_ASCII, _decrypt_ASCII_short_numpy)
 
-    # Shuffle ASCII symbol set to prevent one-to-one char comparison between
+
+# Applies 'fxn' to every item, except that short strings go through 'short_numpy_fxn' in one batch when there are
+# enough of them and NumPy is installed
+def _map_ASCII_many(items, key, fxn, short_numpy_fxn):
+    short = [i for i, item in enumerate(items) if isinstance(item, str) and len(item) <= CHUNK_DIGITS]
+
+    np = _numpy() if len(short) >= NUMPY_BATCH_THRESHOLD else None
+    if np is None:
+        return [fxn(item, key) for item in items]
+
+    results = [None] * len(items)
+    for i, result in zip(short, short_numpy_fxn(np, [items[i] for i in short], key)):
+        results[i] = result
+
+    for i, item in enumerate(items):
+        if results[i] is None:
+            results[i] = fxn(item, key)
+
+    return results
+
+
+# Encrypts a number (integer or float) into ASCII ciphertext
+def encrypt_numeric(number, key):
+    """Encrypts a number (int or float) into ASCII ciphertext (using a DRE.94 key); like encrypt_ASCII, a fixed
+    symbol set is used, so no charset tag is needed."""
+
+    _key_error_check(key)
+
+    # Integers are written in full; floats use repr() so that they are recovered exactly
+    if isinstance(number, _numbers.Integral) and not isinstance(number, bool):
+        plaintext = str(int(number))
+    elif isinstance(number, _numbers.Real) and not isinstance(number, bool):
+        plaintext = repr(float(number))
+    else:
+        msg = f"number must be an integer or a float, not '{type(number).__name__}'"
+        raise TypeError(msg)
+
+    # Shuffle numeric symbol set to prevent one-to-one char comparison between
     # ciphers that used different keys but same plaintext
-    shuffled_ascii = _shuffle(PRINTABLE_ASCII, key)
+    shuffled_numeric = _shuffle(NUMERIC_CHARSET, key)
 
-    # Convert plaintext to base-10 integer using charset. Prepend null char to charset because:
-    #   - leading zero digits in plaintext vanish upon decryption
-    #   - null char is forbidden in plaintext when encrypting
-    #   - hence, initial null char in charset ensures no leading zero digits in plaintext
-    base10_cipher = _baseN_to_base10(plaintext, [NULL_CHAR] + shuffled_ascii)
+    # Convert plaintext to base-10 integer using charset (null char prepended as dummy 0th digit, as in encrypt_ASCII)
+    base10_cipher = _baseN_to_base10(plaintext, [NULL_CHAR] + shuffled_numeric)
 
     # Finally, convert base-10 cipher to base-94 with key
     cipher = _base10_to_baseN(base10_cipher, key)
@@ -265,22 +833,111 @@ def encrypt_ASCII(text_source, key, fromfile=False):
     return cipher
 
 
-def decrypt_ASCII(cipher_source, key, fromfile=False):
-    """Decrypts ASCII ciphertext into ASCII plaintext (using a DRE.94 key)."""
+# Decrypts ASCII ciphertext produced by encrypt_numeric back into a number
+def decrypt_numeric(cipher, key):
+    """Decrypts ASCII ciphertext into a number (using a DRE.94 key); returns an int or a float, whichever was
+    encrypted."""
 
     _key_error_check(key)
 
-    cipher = load_ciphertext(cipher_source, fromfile)
+    cipher = load_ciphertext(cipher, False)
     if cipher == '':
-        return ''
+        msg = 'invalid DRE.94 numeric cipher; cipher cannot be empty'
+        raise ValueError(msg)
 
     # Convert base-94 cipher to base-10 integer using key
     base10_cipher = _baseN_to_base10(cipher, key)
 
-    # Get shuffled ASCII symbol set
-    shuffled_ascii = _shuffle(PRINTABLE_ASCII, key)
+    # Get plaintext (base-19 text) using shuffled numeric charset
+    shuffled_numeric = _shuffle(NUMERIC_CHARSET, key)
+    plaintext = _base10_to_baseN(base10_cipher, [NULL_CHAR] + shuffled_numeric)
+
+    # repr() of a float always contains a decimal point, an exponent, or 'inf'/'nan'; str() of an int never does
+    try:
+        if any(ch in plaintext for ch in '.en'):
+            return float(plaintext)
+        return int(plaintext)
+    except ValueError:
+        msg = 'invalid DRE.94 numeric cipher; decrypted text is not a number (wrong key?)'
+        raise ValueError(msg)
 
-    # Get plaintext (base-100 text) using shuffled ASCII charset
-    plaintext = _base10_to_baseN(base10_cipher, [NULL_CHAR] + shuffled_ascii)
 
-    return plaintext
+# Builds the byte translation tables for a key: byte value -> shuffled digit value, and digit value -> byte value
+@_functools.lru_cache(maxsize=64)
+def _byte_tables(key):
+    shuffled_bytes = bytes(_shuffle(range(256), key))
+    digit_table = bytes(shuffled_bytes.index(i) for i in range(256))
+    return digit_table, shuffled_bytes
+
+
+# Converts bytes to base-10 integer, using the key-shuffled base-256 symbol set
+def _bytes_to_base10(data, key):
+    # Map every byte to its digit in the key-shuffled base-256 symbol set (done in C by bytes.translate)
+    digit_table, _ = _byte_tables(key)
+    digits = data.translate(digit_table)
+
+    # A leading 1 digit plays the role of the null char in encrypt, ensuring that leading zero digits do not vanish
+    # upon decryption
+    return (1 << (8 * len(digits))) | int.from_bytes(digits, 'big')
+
+
+# Converts base-10 integer produced by _bytes_to_base10 back to bytes
+def _base10_to_bytes(base10_cipher, key):
+    # Strip the leading 1 digit; the remaining bits must make up whole bytes
+    length, remainder = divmod(base10_cipher.bit_length() - 1, 8)
+    if remainder != 0:
+        msg = 'invalid DRE.94 bytes cipher; cipher does not decode to whole bytes (wrong key?)'
+        raise ValueError(msg)
+
+    digits = (base10_cipher ^ (1 << (8 * length))).to_bytes(length, 'big')
+
+    # Map digits back to the original bytes
+    _, shuffled_bytes = _byte_tables(key)
+    return digits.translate(shuffled_bytes)
+
+
+# Encrypts binary data (any bytes-like object) into ASCII ciphertext, returned as bytes
+def encrypt_bytes(data, key):
+    """Encrypts binary data (bytes, bytearray, memoryview or any other buffer-protocol object) into ASCII
+    ciphertext returned as bytes (using a DRE.94 key); bytes are used directly as base-256 digits, so no charset tag
+    is needed."""
+
+    _key_error_check(key)
+
+    # bytes() of an int would silently create a zero-filled buffer, so go through memoryview to reject non-buffers
+    if not isinstance(data, bytes):
+        data = bytes(memoryview(data))
+
+    if data == b'':
+        return b''
+
+    base10_cipher = _bytes_to_base10(data, key)
+
+    # Finally, convert base-10 cipher to base-94 digits and map them to the key's bytes (as in encrypt_ASCII), which
+    # produces the bytes directly rather than a str to be encoded
+    key_symbols = _ascii_translation(key)[3]
+    return bytes(_base10_to_digits(base10_cipher, KEY_LENGTH)).translate(key_symbols)
+
+
+# Decrypts ASCII ciphertext produced by encrypt_bytes back into binary data
+def decrypt_bytes(cipher, key):
+    """Decrypts ASCII ciphertext (bytes-like object or str) into binary data returned as bytes (using a DRE.94
+    key)."""
+
+    _key_error_check(key)
+
+    if not isinstance(cipher, str):
+        try:
+            cipher = bytes(memoryview(cipher)).decode('ascii')
+        except UnicodeDecodeError:
+            msg = 'invalid DRE.94 cipher; all characters must be from set of ASCII codes 33 to 126'
+            raise ValueError(msg)
+
+    cipher = load_ciphertext(cipher, False)
+    if cipher == '':
+        return b''
+
+    # Convert base-94 cipher to base-10 integer using key, then back to bytes
+    base10_cipher = _baseN_to_base10(cipher, key)
+
+    return _base10_to_bytes(base10_cipher, key)
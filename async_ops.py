@@ -0,0 +1,95 @@
+"""Asyncio-friendly encryption and decryption that offloads DRE.94's work to an executor."""
+
+
+import asyncio
+import functools
+
+from DRE_94 import encrypt, decrypt
+from implicit import key_error_check, arg_check
+
+# Inputs shorter than this are processed inline, since executor overhead would outweigh the work itself
+INLINE_THRESHOLD = 256
+
+# Default bound on the number of inputs in flight at once in aencrypt_many/adecrypt_many
+MAX_IN_FLIGHT = 32
+
+
+# Runs fxn(source, key, fromfile) inline if the input is tiny, otherwise in the executor (None is the loop's default)
+async def _run(fxn, source, key, fromfile, executor, inline_threshold):
+    # A path says nothing about the size of the file behind it, so file sources are always offloaded
+    if not fromfile and len(source) < inline_threshold:
+        return fxn(source, key, fromfile)
+
+    # If the awaiting task is cancelled, the executor job is cancelled too if it has not started yet
+    # (a job that is already running in a thread or process runs to completion, but its result is discarded)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fxn, source, key, fromfile))
+
+
+# Runs fxn over many sources, with at most 'max_in_flight' of them submitted at once; results keep input order
+async def _run_many(fxn, sources, key, fromfile, executor, max_in_flight, inline_threshold):
+    arg_check(max_in_flight, 'max_in_flight', int)
+    if max_in_flight < 1:
+        msg = f"argument 'max_in_flight' must be at least 1 ({max_in_flight} given)"
+        raise ValueError(msg)
+
+    slots = asyncio.Semaphore(max_in_flight)
+
+    async def run_one(source):
+        try:
+            return await _run(fxn, source, key, fromfile, executor, inline_threshold)
+        finally:
+            slots.release()
+
+    # Sources are only pulled from the iterable when a slot frees up (backpressure for large or lazy inputs)
+    tasks = []
+    try:
+        for source in sources:
+            await slots.acquire()
+            tasks.append(asyncio.ensure_future(run_one(source)))
+
+        return await asyncio.gather(*tasks)
+
+    # On cancellation or the first error, cancel everything still pending before propagating
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def aencrypt(text_source, key, fromfile=False, executor=None, inline_threshold=INLINE_THRESHOLD):
+    """Asynchronous counterpart of DRE_94.encrypt; runs in 'executor' (a thread or process pool, defaulting to the
+    event loop's default executor) so the event loop is not blocked. Inputs shorter than 'inline_threshold'
+    characters are encrypted inline."""
+
+    key_error_check(key)
+    return await _run(encrypt, text_source, key, fromfile, executor, inline_threshold)
+
+
+async def adecrypt(cipher_source, key, fromfile=False, executor=None, inline_threshold=INLINE_THRESHOLD):
+    """Asynchronous counterpart of DRE_94.decrypt; runs in 'executor' (a thread or process pool, defaulting to the
+    event loop's default executor) so the event loop is not blocked. Ciphers shorter than 'inline_threshold'
+    characters are decrypted inline."""
+
+    key_error_check(key)
+    return await _run(decrypt, cipher_source, key, fromfile, executor, inline_threshold)
+
+
+async def aencrypt_many(text_sources, key, fromfile=False, executor=None, max_in_flight=MAX_IN_FLIGHT,
+                        inline_threshold=INLINE_THRESHOLD):
+    """Encrypts every text in the iterable 'text_sources' concurrently in 'executor', with at most 'max_in_flight'
+    texts submitted at a time; returns the list of ciphers in input order. Cancelling the call cancels all
+    pending work."""
+
+    key_error_check(key)
+    return await _run_many(encrypt, text_sources, key, fromfile, executor, max_in_flight, inline_threshold)
+
+
+async def adecrypt_many(cipher_sources, key, fromfile=False, executor=None, max_in_flight=MAX_IN_FLIGHT,
+                        inline_threshold=INLINE_THRESHOLD):
+    """Decrypts every cipher in the iterable 'cipher_sources' concurrently in 'executor', with at most
+    'max_in_flight' ciphers submitted at a time; returns the list of plaintexts in input order. Cancelling the
+    call cancels all pending work."""
+
+    key_error_check(key)
+    return await _run_many(decrypt, cipher_sources, key, fromfile, executor, max_in_flight, inline_threshold)
@@ -0,0 +1,179 @@
+"""Functions that benchmark DRE.94's speed and cipher size."""
+
+
+import os
+import random
+import subprocess
+import sys
+import time
+
+from DRE_94 import (
+    generate_key, encrypt, decrypt, encrypt_ASCII, NUMPY_THRESHOLD, _numpy, _encrypt_ASCII_translate,
+    _decrypt_ASCII_translate, _encrypt_ASCII_numpy, _decrypt_ASCII_numpy
+)
+from global_constants import CIPHER_VERSIONS
+from implicit import key_error_check, arg_check
+
+# Modules whose import time is guarded by import_time_test
+IMPORT_MODULES = ('DRE_94', 'key_ops', 'radix', 'misc', 'tabular', 'dre94', 'client', 'cipher_index', 'jsonl', 'rekey')
+
+# Heavy dependencies that must only be imported when first used, not upon importing any of IMPORT_MODULES
+DEFERRED_IMPORTS = ('pandas', 'numpy', 'gmpy2', 'asyncio', 'multiprocessing', 'lzma', 'traceback')
+
+# Run in a fresh interpreter to time one import; prints the time and which deferred imports were pulled in
+_IMPORT_TIMER = """
+import sys, time
+t1 = time.perf_counter()
+import {module}
+t2 = time.perf_counter()
+print(t2 - t1, *[name for name in {deferred!r} if name in sys.modules])
+"""
+
+
+# Sample plaintexts: typical ASCII prose, and text with a large number of distinct code points
+def sample_texts(length=2000, seed=0):
+    """Returns a dict of sample plaintexts of the given length, used by the benchmarks."""
+
+    rng = random.Random(seed)
+    words = ['the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'DRE.94', 'cipher', '2021', '{"id": 7}']
+
+    prose = ''
+    while len(prose) < length:
+        prose += rng.choice(words) + rng.choice(' \n,.')
+
+    # Code points spread over the Basic Multilingual Plane, as in text mixing many scripts
+    diverse = ''.join(chr(rng.randint(0x20, 0xD7FF)) for _ in range(length))
+
+    return {'ASCII prose': prose[:length], 'diverse Unicode': diverse}
+
+
+# Compares cipher size and encryption/decryption time of every cipher version over the sample plaintexts
+def cipher_size_report(length=2000, key=None, verbose=True):
+    """Encrypts the sample plaintexts with every cipher version and reports cipher size (relative to version 1) and
+    encryption/decryption times. Returns a dict mapping (sample name, version) to (cipher length, encryption
+    seconds, decryption seconds)."""
+
+    arg_check(length, 'length', int)
+    arg_check(verbose, 'verbose', bool)
+    if key is None:
+        key = generate_key()
+    else:
+        key_error_check(key)
+
+    # If verbose is on, vprint is same as default print; if verbose is off, vprint is a do-nothing function
+    if verbose:
+        vprint = print
+    else:
+        def vprint(*_args, **_kwargs): pass
+
+    results = {}
+    for name, text in sample_texts(length).items():
+        vprint(f'{name} ({length} characters, {len(set(text))} distinct):')
+
+        for version in CIPHER_VERSIONS:
+            t1 = time.perf_counter()
+            cipher = encrypt(text, key, version=version)
+            t2 = time.perf_counter()
+            decrypt(cipher, key, version=version)
+            t3 = time.perf_counter()
+
+            results[name, version] = (len(cipher), t2 - t1, t3 - t2)
+
+            reduction = 1 - len(cipher) / results[name, CIPHER_VERSIONS[0]][0]
+            vprint(f'    version {version}: {len(cipher):>8} chars ({reduction:6.1%} smaller)   '
+                   f'encrypt {t2 - t1:.4f} s   decrypt {t3 - t2:.4f} s')
+
+        vprint()
+
+    return results
+
+
+# Times the two conversions of ASCII mode (bytes.translate and NumPy) at several lengths, to tune NUMPY_THRESHOLD
+def ascii_threshold_report(lengths=(100, 300, 1000, 3000, 10000, 30000), trials=20, key=None, verbose=True):
+    """Encrypts and decrypts ASCII prose of each length with both conversions of encrypt_ASCII/decrypt_ASCII (with
+    bytes.translate, and with NumPy) and reports the best time of several trials; DRE_94.NUMPY_THRESHOLD should be
+    about the shortest length from which NumPy is faster. Returns a dict mapping length to (translate seconds, NumPy
+    seconds), or an empty dict if NumPy is not installed."""
+
+    arg_check(trials, 'trials', int)
+    arg_check(verbose, 'verbose', bool)
+    if key is None:
+        key = generate_key()
+    else:
+        key_error_check(key)
+
+    # If verbose is on, vprint is same as default print; if verbose is off, vprint is a do-nothing function
+    if verbose:
+        vprint = print
+    else:
+        def vprint(*_args, **_kwargs): pass
+
+    np = _numpy()
+    if np is None:
+        vprint('NumPy is not installed; ASCII mode always uses bytes.translate')
+        return {}
+
+    def best_time(fxn, *args):
+        best = None
+        for _ in range(trials):
+            t1 = time.perf_counter()
+            fxn(*args)
+            t2 = time.perf_counter()
+            best = t2 - t1 if best is None else min(best, t2 - t1)
+        return best
+
+    results = {}
+    for length in lengths:
+        text = sample_texts(length)['ASCII prose']
+        cipher = encrypt_ASCII(text, key)
+
+        translate = (best_time(_encrypt_ASCII_translate, text, key)
+                     + best_time(_decrypt_ASCII_translate, cipher, key))
+        numpy = (best_time(_encrypt_ASCII_numpy, np, text, key)
+                 + best_time(_decrypt_ASCII_numpy, np, cipher, key))
+        results[length] = (translate, numpy)
+
+        vprint(f'{length:>8} chars   translate {translate * 1000:9.3f} ms   NumPy {numpy * 1000:9.3f} ms   '
+               f'({"NumPy" if numpy < translate else "translate"} faster)')
+
+    vprint(f'NUMPY_THRESHOLD = {NUMPY_THRESHOLD}')
+
+    return results
+
+
+# Guards library startup latency: each module must import within the time limit without pulling in heavy dependencies
+def import_time_test(limit=0.05, trials=5, modules=IMPORT_MODULES, verbose=True):
+    """Imports each module in a fresh interpreter (best of several trials) and checks that the import takes at most
+    'limit' seconds and does not import any of the heavy dependencies that are meant to be loaded lazily. Returns
+    True or False (pass or fail, respectively)."""
+
+    arg_check(limit, 'limit', (float, int))
+    arg_check(trials, 'trials', int)
+    arg_check(verbose, 'verbose', bool)
+
+    # If verbose is on, vprint is same as default print; if verbose is off, vprint is a do-nothing function
+    if verbose:
+        vprint = print
+    else:
+        def vprint(*_args, **_kwargs): pass
+
+    library_dir = os.path.dirname(os.path.abspath(__file__))
+
+    success = True
+    for module in modules:
+        code = _IMPORT_TIMER.format(module=module, deferred=DEFERRED_IMPORTS)
+
+        best = None
+        for _ in range(trials):
+            result = subprocess.run([sys.executable, '-c', code], cwd=library_dir, capture_output=True, text=True,
+                                    check=True)
+            elapsed, *imported = result.stdout.split()
+            best = float(elapsed) if best is None else min(best, float(elapsed))
+
+        passed = best <= limit and not imported
+        success = success and passed
+
+        vprint(f'{module:<12} {best * 1000:8.2f} ms   {"PASS" if passed else "FAIL"}'
+               + (f'   (imported {", ".join(imported)})' if imported else ''))
+
+    return success
@@ -0,0 +1,135 @@
+"""Functions for encrypting and decrypting whole directory trees of text files."""
+
+
+import os
+import pathlib
+import time
+
+from DRE_94 import encrypt, decrypt
+from implicit import key_error_check, arg_check, version_check, compression_check, worker_pool
+from misc import save
+
+# Suffix appended to the names of encrypted files (and stripped from them upon decryption)
+CIPHER_SUFFIX = '.dre94'
+
+
+# Worker for a single file (module-level so that it can be sent to worker processes); returns the elapsed seconds
+def _process_file(fxn, source, destination, key, options):
+    t1 = time.perf_counter()
+    result = fxn(source, key, fromfile=True, **options)
+    save(result, destination)  # written atomically
+    return time.perf_counter() - t1
+
+
+# Lists (source, destination, size) for every file matching the pattern whose output is missing or older than it
+def _plan(src_dir, dst_dir, pattern, rename):
+    plan = []
+    skipped = []
+    for source in sorted(src_dir.rglob(pattern)):
+        if not source.is_file():
+            continue
+
+        destination = dst_dir / rename(source.relative_to(src_dir))
+        stat = source.stat()
+
+        # Skip files that were already processed since they last changed
+        if destination.exists() and destination.stat().st_mtime >= stat.st_mtime:
+            skipped.append(source)
+        else:
+            plan.append((source, destination, stat.st_size))
+
+    # Largest files first, so that a big file scheduled last does not leave the other workers idle at the end
+    plan.sort(key=lambda item: item[2], reverse=True)
+    return plan, skipped
+
+
+def _process_tree(fxn, src_dir, dst_dir, key, pattern, rename, workers, verbose, options):
+    key_error_check(key)
+    arg_check(pattern, 'pattern', str)
+    arg_check(verbose, 'verbose', bool)
+    if workers is not None:
+        arg_check(workers, 'workers', int)
+
+    # If verbose is on, vprint is same as default print; if verbose is off, vprint is a do-nothing function
+    if verbose:
+        vprint = print
+    else:
+        def vprint(*_args, **_kwargs): pass
+
+    # Resolved against the current directory, since encrypt/decrypt would join relative paths to the driver's directory
+    src_dir = pathlib.Path(src_dir).resolve()
+    dst_dir = pathlib.Path(dst_dir).resolve()
+    if not src_dir.is_dir():
+        msg = f'source directory does not exist: {src_dir}'
+        raise NotADirectoryError(msg)
+
+    plan, skipped = _plan(src_dir, dst_dir, pattern, rename)
+    for _, destination, _ in plan:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    report = []
+
+    def record(source, destination, size, seconds):
+        report.append({'source': source, 'destination': destination, 'bytes': size, 'seconds': seconds,
+                       'throughput': size / seconds if seconds > 0 else float('inf')})
+        vprint(f'{str(source.relative_to(src_dir)):<40} {size:>12} bytes {seconds:10.3f} s '
+               f'{report[-1]["throughput"] / 1024:12.1f} KB/s')
+
+    if workers <= 1 or len(plan) <= 1:
+        for source, destination, size in plan:
+            record(source, destination, size, _process_file(fxn, source, destination, key, options))
+
+    else:
+        # Files are recorded as they complete, whatever their order
+        from concurrent.futures import as_completed
+
+        with worker_pool(min(workers, len(plan))) as executor:
+            futures = {}
+            for source, destination, size in plan:
+                future = executor.submit(_process_file, fxn, source, destination, key, options)
+                futures[future] = (source, destination, size)
+
+            for future in as_completed(futures):
+                record(*futures[future], future.result())
+
+    vprint(f'{len(report)} file(s) processed, {len(skipped)} skipped (output up to date)')
+    for source in skipped:
+        report.append({'source': source, 'destination': None, 'bytes': 0, 'seconds': 0.0, 'throughput': None})
+
+    return report
+
+
+def encrypt_tree(src_dir, dst_dir, key, pattern='*.txt', workers=None, verbose=True, version=1, compress=None,
+                 level=None):
+    """Encrypts every file under 'src_dir' matching the glob 'pattern' (searched recursively) into the same relative
+    path under 'dst_dir', with CIPHER_SUFFIX appended to the file name. Files are spread over 'workers' processes
+    (default: number of CPUs), largest first; each output is written atomically, and files whose output is newer
+    are skipped. Returns a list of per-file reports (dicts with source, destination, bytes, seconds, throughput in
+    bytes per second; skipped files have a destination of None)."""
+
+    version_check(version)
+    compression_check(compress, level, version)
+    options = {'version': version, 'compress': compress, 'level': level}
+
+    def rename(path):
+        return path.with_name(path.name + CIPHER_SUFFIX)
+
+    return _process_tree(encrypt, src_dir, dst_dir, key, pattern, rename, workers, verbose, options)
+
+
+def decrypt_tree(src_dir, dst_dir, key, pattern='*' + CIPHER_SUFFIX, workers=None, verbose=True, version=1):
+    """Decrypts every file under 'src_dir' matching the glob 'pattern' (searched recursively) into the same relative
+    path under 'dst_dir', with CIPHER_SUFFIX removed from the file name. Works like encrypt_tree and returns the same
+    kind of report."""
+
+    version_check(version)
+
+    def rename(path):
+        if path.name.endswith(CIPHER_SUFFIX):
+            return path.with_name(path.name[:-len(CIPHER_SUFFIX)])
+        return path
+
+    return _process_tree(decrypt, src_dir, dst_dir, key, pattern, rename, workers, verbose, {'version': version})
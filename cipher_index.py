@@ -0,0 +1,235 @@
+"""Equality indexes over encrypted columns: since DRE.94 encryption is deterministic per key, a column encrypted by
+tabular.encrypt_tabular_data can be searched by encrypting the probe and matching ciphers, without decryption."""
+
+
+import hashlib
+import json
+import os
+import struct
+
+from urllib.parse import quote
+
+from DRE_94 import encrypt, encrypt_numeric
+from implicit import key_error_check, arg_check
+from misc import temp_file_for
+from tabular import read_tabular, load_schema
+
+# Index files start with this magic string, then the size of the JSON header (4 bytes, little-endian), the header,
+# and padding up to a multiple of 16 bytes; the rest of the file is the sorted records
+INDEX_MAGIC = b'DRE94IDX'
+INDEX_SUFFIX = '.dre94idx'
+
+# Each record is the 64-bit hash of a cell's cipher and the cell's row position, both unsigned little-endian
+RECORD_SIZE = 16
+
+
+# NumPy is imported when indexes are first used rather than upon importing the module
+def _numpy():
+    import numpy
+    return numpy
+
+
+def _record_dtype():
+    np = _numpy()
+    return np.dtype([('hash', '<u8'), ('row', '<u8')])
+
+
+# 64-bit hash of a cipher (any good hash will do; matching rows are found by comparing hashes, so only the rare
+# collision can return a row whose cipher differs, with probability about rows / 2 ** 64 per lookup)
+def cipher_hash(cipher):
+    """Returns the 64-bit hash under which a cipher is stored in an index."""
+
+    return int.from_bytes(hashlib.blake2b(str(cipher).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def index_path(data_file, column):
+    """Returns the default path of the index of a column of a data file: the data file's path followed by the
+    (percent-encoded) column name and INDEX_SUFFIX."""
+
+    return f'{os.fspath(data_file)}.{quote(str(column), safe="")}{INDEX_SUFFIX}'
+
+
+class CipherIndex:
+    """Equality index of one encrypted column, as written by build_index: 'column' is the column name, 'mode' and
+    'dtype' are the column's cipher mode ('text' or 'numeric') and original dtype from the schema record (dtype None
+    if unknown), and 'count' is the number of rows indexed. The records are memory-mapped if 'use_mmap' is set (only
+    the pages touched by lookups are read), otherwise read into memory. Can be used as a context manager."""
+
+    def __init__(self, path, use_mmap=True):
+        arg_check(use_mmap, 'use_mmap', bool)
+        np = _numpy()
+
+        self.path = os.fspath(path)
+        self._mmap = None
+
+        with open(self.path, 'rb') as index_file:
+            if index_file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                msg = f'not a DRE.94 cipher index: {self.path}'
+                raise ValueError(msg)
+
+            header_size, = struct.unpack('<I', index_file.read(4))
+            header = json.loads(index_file.read(header_size))
+            offset = -(-(len(INDEX_MAGIC) + 4 + header_size) // RECORD_SIZE) * RECORD_SIZE
+
+            self.column = header['column']
+            self.mode = header['mode']
+            self.dtype = header.get('dtype')  # not recorded by indexes built without a schema record
+            self.count = header['count']
+
+            if use_mmap and self.count > 0:
+                # Imported here, since it is only needed for memory-mapped indexes
+                import mmap
+
+                self._mmap = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._records = np.frombuffer(self._mmap, dtype=_record_dtype(), count=self.count, offset=offset)
+            else:
+                index_file.seek(offset)
+                self._records = np.fromfile(index_file, dtype=_record_dtype(), count=self.count)
+
+        if len(self._records) != self.count:
+            msg = f'truncated DRE.94 cipher index: {self.path}'
+            raise ValueError(msg)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """Releases the index file (the index cannot be used afterwards)."""
+
+        self._records = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def rows_for_cipher(self, cipher):
+        """Returns the row positions (sorted) whose cell has the given cipher, by binary search over the hashes."""
+
+        hashes = self._records['hash']
+        probe = _numpy().uint64(cipher_hash(cipher))
+        start = hashes.searchsorted(probe, side='left')
+        end = hashes.searchsorted(probe, side='right')
+        return sorted(self._records['row'][start:end].tolist())
+
+
+def build_index(data_source, column, save_as=None, schema=None):
+    """Builds the equality index of an encrypted column of a CSV/Excel file or Pandas Dataframe and saves it to
+    'save_as' (default for files: index_path(data_source, column); required for Dataframes), atomically. The column's
+    cipher mode is taken from the schema record ('schema' if given, else the Dataframe's attrs or the sidecar file of
+    data_source), along with its original dtype, which lookup converts probes to. Returns the opened CipherIndex."""
+
+    np = _numpy()
+
+    if type(data_source) == str:
+        dataframe = read_tabular(data_source, converters={column: str}, usecols=[column])
+        if save_as is None:
+            save_as = index_path(data_source, column)
+    else:
+        dataframe = data_source
+        if save_as is None:
+            msg = "keyword argument 'save_as' is required when indexing a Dataframe"
+            raise TypeError(msg)
+
+    if column not in dataframe.columns:
+        msg = f'column not found in tabular data: {column}'
+        raise KeyError(msg)
+
+    entry = load_schema(data_source, dataframe, schema).get(column, {})
+    mode = entry.get('mode', 'text')
+    dtype = entry.get('dtype')
+
+    # Records sorted by hash (rows of equal ciphers stay in row order)
+    hashes = np.fromiter(map(cipher_hash, dataframe[column]), dtype=np.uint64, count=len(dataframe))
+    order = np.argsort(hashes, kind='stable')
+    records = np.empty(len(hashes), dtype=_record_dtype())
+    records['hash'] = hashes[order]
+    records['row'] = order
+
+    header = json.dumps({'column': column, 'mode': mode, 'dtype': dtype, 'count': len(records)}).encode('utf-8')
+    preamble = INDEX_MAGIC + struct.pack('<I', len(header)) + header
+    preamble += b'\0' * (-len(preamble) % RECORD_SIZE)
+
+    # Written to a temp file that replaces 'save_as' once complete, as in misc.save
+    fd, temp_path = temp_file_for(save_as)
+    try:
+        with os.fdopen(fd, 'wb') as index_file:
+            index_file.write(preamble)
+            index_file.write(records.tobytes())
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        os.replace(temp_path, save_as)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return CipherIndex(save_as)
+
+
+def open_index(path, use_mmap=True):
+    """Opens an index saved by build_index (memory-mapped by default)."""
+
+    return CipherIndex(path, use_mmap)
+
+
+# Converts a probe to a value of the column's original dtype, as its cells were before encryption (e.g. 2.0 or '2' to 2
+# for an integer column); raises ValueError if the probe cannot equal any value of that dtype (e.g. 2.5 for integers)
+def _coerce_probe(plaintext, dtype):
+    if dtype is None:
+        return plaintext
+
+    try:
+        kind = _numpy().dtype(dtype).kind
+    except TypeError:
+        return plaintext  # Pandas extension dtype; compared as is
+
+    if kind in 'iu':
+        number = plaintext
+        if isinstance(plaintext, str):
+            number = float(plaintext) if any(ch in plaintext for ch in '.eEnN') else int(plaintext)
+        if isinstance(number, bool) or number != int(number):
+            msg = f'{plaintext!r} is not an integer'
+            raise ValueError(msg)
+        return int(number)
+
+    if kind == 'f':
+        if isinstance(plaintext, bool):
+            msg = f'{plaintext!r} is not a number'
+            raise ValueError(msg)
+        return float(plaintext)
+
+    if kind == 'b':
+        if isinstance(plaintext, str):
+            if plaintext not in ('True', 'False'):
+                msg = f'{plaintext!r} is not a boolean'
+                raise ValueError(msg)
+            return plaintext == 'True'
+        if plaintext not in (0, 1):
+            msg = f'{plaintext!r} is not a boolean'
+            raise ValueError(msg)
+        return bool(plaintext)
+
+    return plaintext
+
+
+def lookup(column, plaintext, key):
+    """Returns the row positions (sorted) whose cell in the indexed column decrypts to 'plaintext', by encrypting the
+    probe once with the column's cipher mode and searching the index; 'column' is a CipherIndex (see build_index
+    and open_index). The probe is first converted to the column's original dtype, so that e.g. 2, 2.0 and '2' all
+    find the cells of an integer column holding 2 (a probe that cannot be converted matches no row)."""
+
+    key_error_check(key)
+
+    try:
+        plaintext = _coerce_probe(plaintext, column.dtype)
+    except (ValueError, TypeError, OverflowError):
+        return []
+
+    if column.mode == 'numeric':
+        cipher = encrypt_numeric(plaintext, key)
+    else:
+        cipher = encrypt(str(plaintext), key)  # as in encrypt_tabular_data
+
+    return column.rows_for_cipher(cipher)
@@ -0,0 +1,152 @@
+"""Client of the DRE.94 daemon (see daemon.py); mirrors DRE_94's encryption functions over a Unix domain socket."""
+
+
+import json
+import os
+import socket
+import struct
+
+# Every message is a JSON object, prefixed with its size in bytes (4 bytes, big-endian)
+HEADER = struct.Struct('>I')
+
+# Largest message either side accepts, in bytes
+MAX_MESSAGE_SIZE = 1 << 28
+
+# Exception types that the daemon reports by name and the client raises again as such; others become RuntimeError
+ERROR_TYPES = {'ValueError': ValueError, 'TypeError': TypeError, 'UnicodeError': UnicodeError}
+
+
+def default_socket_path():
+    """Returns the default socket path of the daemon: $DRE94_SOCKET if set, otherwise dre94-<uid>.sock in
+    $XDG_RUNTIME_DIR (or /tmp)."""
+
+    path = os.environ.get('DRE94_SOCKET')
+    if path:
+        return path
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or '/tmp', f'dre94-{os.getuid()}.sock')
+
+
+# Encodes a message as its header followed by the JSON body (ASCII only, since non-ASCII characters are escaped)
+def encode_message(message):
+    body = json.dumps(message).encode('ascii')
+    if len(body) > MAX_MESSAGE_SIZE:
+        msg = f'message too large ({len(body)} bytes, at most {MAX_MESSAGE_SIZE})'
+        raise ValueError(msg)
+    return HEADER.pack(len(body)) + body
+
+
+def decode_size(header):
+    """Returns the size of a message from its header, checking it against MAX_MESSAGE_SIZE."""
+
+    size, = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        msg = f'message too large ({size} bytes, at most {MAX_MESSAGE_SIZE})'
+        raise ValueError(msg)
+    return size
+
+
+class Client:
+    """Connection to the DRE.94 daemon listening on 'path' (default: default_socket_path()). Requests are sent one
+    at a time over a single connection, which is opened on first use; use one client per thread, or several clients
+    to have requests batched by the daemon. Can be used as a context manager."""
+
+    def __init__(self, path=None, timeout=None):
+        self.path = default_socket_path() if path is None else os.fspath(path)
+        self.timeout = timeout
+        self._sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """Closes the connection (it is opened again by the next request)."""
+
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _recv_exactly(self, size):
+        chunks = []
+        while size > 0:
+            chunk = self._sock.recv(min(size, 1 << 20))
+            if not chunk:
+                msg = 'connection closed by the DRE.94 daemon'
+                raise ConnectionError(msg)
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def request(self, op, source, key, **options):
+        """Sends one request (op is the name of a DRE_94 function, e.g. 'encrypt') and returns its result; errors
+        raised by the function are raised again here."""
+
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self.timeout)
+            try:
+                self._sock.connect(self.path)
+            except OSError:
+                self.close()
+                raise
+
+        try:
+            self._sock.sendall(encode_message({'op': op, 'source': source, 'key': key, 'options': options}))
+            response = json.loads(self._recv_exactly(decode_size(self._recv_exactly(HEADER.size))))
+
+        # The connection is in an unknown state after a failure (e.g. a timeout halfway through a message)
+        except BaseException:
+            self.close()
+            raise
+
+        if not response['ok']:
+            raise ERROR_TYPES.get(response['error'], RuntimeError)(response['message'])
+        return response['result']
+
+    def encrypt(self, text, key, version=1, compress=None, level=None):
+        """Same as DRE_94.encrypt (on literal text), done by the daemon."""
+
+        return self.request('encrypt', text, key, version=version, compress=compress, level=level)
+
+    def decrypt(self, cipher, key, version=1):
+        """Same as DRE_94.decrypt (on a literal cipher), done by the daemon."""
+
+        return self.request('decrypt', cipher, key, version=version)
+
+    def encrypt_ASCII(self, text, key):
+        """Same as DRE_94.encrypt_ASCII (on literal text), done by the daemon."""
+
+        return self.request('encrypt_ASCII', text, key)
+
+    def decrypt_ASCII(self, cipher, key):
+        """Same as DRE_94.decrypt_ASCII (on a literal cipher), done by the daemon."""
+
+        return self.request('decrypt_ASCII', cipher, key)
+
+
+# One connection per socket path, shared by the module-level functions below
+_clients = {}
+
+
+def _client(path):
+    path = default_socket_path() if path is None else os.fspath(path)
+    if path not in _clients:
+        _clients[path] = Client(path)
+    return _clients[path]
+
+
+def encrypt(text, key, version=1, compress=None, level=None, path=None):
+    """Same as DRE_94.encrypt (on literal text), done by the daemon listening on 'path' (default:
+    default_socket_path())."""
+
+    return _client(path).encrypt(text, key, version, compress, level)
+
+
+def decrypt(cipher, key, version=1, path=None):
+    """Same as DRE_94.decrypt (on a literal cipher), done by the daemon listening on 'path' (default:
+    default_socket_path())."""
+
+    return _client(path).decrypt(cipher, key, version)
@@ -0,0 +1,264 @@
+"""Local DRE.94 daemon: serves encryption requests over a Unix domain socket (see client.py), so that short-lived
+processes skip Python startup, imports and key preparation; run as 'python -m daemon [--socket PATH] ...'."""
+
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+
+from concurrent.futures import ProcessPoolExecutor
+from DRE_94 import encrypt, decrypt, encrypt_ASCII, decrypt_ASCII, encrypt_numeric, decrypt_numeric
+from client import HEADER, ERROR_TYPES, default_socket_path, encode_message, decode_size
+from implicit import arg_check
+
+# Functions served by the daemon, with the keyword options each one accepts (reading files is not offered)
+OPERATIONS = {
+    'encrypt': (encrypt, ('version', 'compress', 'level')),
+    'decrypt': (decrypt, ('version',)),
+    'encrypt_ASCII': (encrypt_ASCII, ()),
+    'decrypt_ASCII': (decrypt_ASCII, ()),
+    'encrypt_numeric': (encrypt_numeric, ()),
+    'decrypt_numeric': (decrypt_numeric, ()),
+}
+
+# Most requests handled in one batch
+BATCH_SIZE = 64
+
+# Batches whose inputs add up to fewer characters than this are handled in the daemon process itself, since sending
+# them to a worker would take longer than the work
+INLINE_THRESHOLD = 4096
+
+
+# Checks the fields of a request; returns the function to call and its keyword options
+def _parse_request(request):
+    if not isinstance(request, dict) or 'source' not in request or 'key' not in request:
+        msg = "invalid request; must be an object with 'op', 'source' and 'key' (and optionally 'options')"
+        raise ValueError(msg)
+
+    if request.get('op') not in OPERATIONS:
+        msg = f"invalid request; unknown op '{request.get('op')}' (must be one of: {', '.join(OPERATIONS)})"
+        raise ValueError(msg)
+
+    fxn, allowed = OPERATIONS[request['op']]
+    options = request.get('options') or {}
+    if not isinstance(options, dict) or not set(options) <= set(allowed):
+        msg = f"invalid request; options of {request['op']} can only be: {', '.join(allowed) or 'none'}"
+        raise ValueError(msg)
+
+    return fxn, options
+
+
+# Handles one request; returns the response (module-level, like _run_batch, so that it can run in worker processes)
+def _run_request(request):
+    try:
+        fxn, options = _parse_request(request)
+        return {'ok': True, 'result': fxn(request['source'], request['key'], **options)}
+
+    except Exception as e:
+        error = type(e).__name__ if type(e).__name__ in ERROR_TYPES else 'RuntimeError'
+        return {'ok': False, 'error': error, 'message': str(e)}
+
+
+def _run_batch(requests):
+    return [_run_request(request) for request in requests]
+
+
+# Size of a request, used to decide whether a batch is handled inline
+def _request_size(request):
+    source = request.get('source') if isinstance(request, dict) else None
+    return len(source) if isinstance(source, str) else 1
+
+
+class _Server:
+    def __init__(self, executor, workers, batch_size, batch_window):
+        self.executor = executor
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.queue = asyncio.Queue()
+        self.tasks = set()  # batches in progress (the event loop only keeps weak references to tasks)
+        self.connections = {}  # open connections: handler task -> writer
+
+    # Reads length-prefixed requests from one connection and answers each in turn
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    size = decode_size(await reader.readexactly(HEADER.size))
+                    body = await reader.readexactly(size)
+                except asyncio.IncompleteReadError:
+                    return  # client closed the connection
+
+                try:
+                    request = json.loads(body)
+                except ValueError:
+                    response = {'ok': False, 'error': 'ValueError', 'message': 'invalid request; body is not JSON'}
+                else:
+                    future = loop.create_future()
+                    await self.queue.put((request, future))
+                    response = await future
+
+                writer.write(encode_message(response))
+                await writer.drain()
+
+        except (ValueError, ConnectionError):
+            pass  # oversized message or broken connection; drop the connection
+        finally:
+            del self.connections[asyncio.current_task()]
+            writer.close()
+
+    # Closes every open connection and lets the handlers finish (cancelling them instead would have asyncio report
+    # the cancellations as unhandled errors)
+    async def close_connections(self, timeout=1.0):
+        for writer in self.connections.values():
+            writer.close()
+        if self.connections:
+            await asyncio.wait(list(self.connections), timeout=timeout)
+
+    # Collects queued requests into batches: every request waiting in the queue (up to batch_size), plus those arriving
+    # within batch_window seconds of the first one
+    async def batch_requests(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+
+            while len(batch) < self.batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.ensure_future(self.run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    # Handles a batch inline if it is small, otherwise spreads it over the worker pool; then resolves every future
+    async def run_batch(self, batch):
+        requests = [request for request, _ in batch]
+        futures = [future for _, future in batch]
+
+        if sum(map(_request_size, requests)) < INLINE_THRESHOLD:
+            responses = _run_batch(requests)
+        else:
+            loop = asyncio.get_running_loop()
+            step = -(-len(requests) // self.workers)
+            chunks = [requests[i:i + step] for i in range(0, len(requests), step)]
+            try:
+                results = await asyncio.gather(*[loop.run_in_executor(self.executor, _run_batch, chunk)
+                                                 for chunk in chunks])
+                responses = [response for result in results for response in result]
+
+            # E.g. a worker process died; every request of the batch gets the error, so that no client waits forever
+            except Exception as e:
+                error = {'ok': False, 'error': 'RuntimeError', 'message': f'DRE.94 daemon error: {e!r}'}
+                responses = [error] * len(batch)
+
+        for future, response in zip(futures, responses):
+            if not future.done():
+                future.set_result(response)
+
+
+# Removes a socket file left behind by a daemon that is no longer running; fails if a daemon is listening on it
+def _remove_stale_socket(path):
+    if not os.path.exists(path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        msg = f'a DRE.94 daemon is already listening on {path}'
+        raise OSError(msg)
+    finally:
+        probe.close()
+
+
+async def _serve(path, workers, batch_size, batch_window, ready):
+    _remove_stale_socket(path)
+
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+
+    with ProcessPoolExecutor(workers) as executor:
+        server = _Server(executor, workers, batch_size, batch_window)
+        batcher = asyncio.ensure_future(server.batch_requests())
+
+        # The socket is only accessible to the owner, since requests carry keys
+        old_umask = os.umask(0o177)
+        try:
+            unix_server = await asyncio.start_unix_server(server.handle_connection, path)
+        finally:
+            os.umask(old_umask)
+
+        try:
+            if ready is not None:
+                ready()
+            await stop
+        finally:
+            batcher.cancel()
+            unix_server.close()
+            await server.close_connections()
+            await unix_server.wait_closed()
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def serve(path=None, workers=None, batch_size=BATCH_SIZE, batch_window=0.0, ready=None):
+    """Runs the daemon on the Unix domain socket 'path' (default: client.default_socket_path()) until SIGINT or
+    SIGTERM. Requests waiting together (plus those arriving within 'batch_window' seconds) are handled as one batch
+    of at most 'batch_size' requests, spread over a pool of 'workers' processes (default: number of CPUs) unless the
+    batch is tiny. The daemon and its long-lived workers keep their per-key caches (validated keys, shuffled symbol
+    sets, translation tables) warm across requests. 'ready', if given, is called once the socket accepts
+    connections."""
+
+    arg_check(batch_size, 'batch_size', int)
+    arg_check(batch_window, 'batch_window', (float, int))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    arg_check(workers, 'workers', int)
+    if workers < 1 or batch_size < 1:
+        msg = "arguments 'workers' and 'batch_size' must be at least 1"
+        raise ValueError(msg)
+
+    path = default_socket_path() if path is None else os.fspath(path)
+    asyncio.run(_serve(path, workers, batch_size, batch_window, ready))
+
+
+def main(argv=None):
+    """Runs the daemon with the given command-line arguments (default: sys.argv[1:])."""
+
+    parser = argparse.ArgumentParser(prog='daemon', description='DRE.94 encryption daemon (Unix domain socket).')
+    parser.add_argument('-s', '--socket', help=f'socket path (default: {default_socket_path()})')
+    parser.add_argument('-w', '--workers', type=int, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'most requests per batch (default: {BATCH_SIZE})')
+    parser.add_argument('--batch-window', type=float, default=0.0,
+                        help='seconds to wait for more requests before handling a batch (default: 0)')
+    args = parser.parse_args(argv)
+
+    try:
+        serve(args.socket, args.workers, args.batch_size, args.batch_window,
+              ready=lambda: print(f'DRE.94 daemon listening on {args.socket or default_socket_path()}', flush=True))
+    except (ValueError, TypeError, OSError) as e:
+        parser.exit(1, f'{parser.prog}: error: {e}\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""Command-line tool for DRE.94; run as 'python -m dre94 {encrypt,decrypt,keygen,bench} ...' (see --help)."""
+
+
+import argparse
+import functools
+import io
+import sys
+
+from DRE_94 import generate_key, encrypt, decrypt
+from global_constants import CIPHER_VERSIONS, COMPRESSION_FLAGS
+from implicit import key_error_check, ordered_map
+from misc import CipherWriter
+
+# Default number of characters per block in stream mode
+BLOCK_SIZE = 4096
+
+# Number of records handed to the worker pool per worker at a time (bounds memory on large inputs)
+RECORDS_PER_WORKER = 16
+
+
+# Opens the input for reading text; newline='' keeps line endings untranslated so that plaintext round-trips exactly
+def _open_input(path, encoding):
+    if path is None or path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding=encoding, newline='')
+    return open(path, encoding=encoding, newline='')
+
+
+# Output files are written through CipherWriter, so they are only replaced once the whole output was written
+def _open_output(path, encoding):
+    if path is None or path == '-':
+        return io.TextIOWrapper(sys.stdout.buffer, encoding=encoding, newline='', write_through=True)
+    return CipherWriter(path, encoding=encoding, newline='')
+
+
+def _read_key(args):
+    if args.key_file is not None:
+        with open(args.key_file) as key_file:
+            key = key_file.read().strip()
+    else:
+        key = args.key
+
+    key_error_check(key)
+    return key
+
+
+# Yields fixed-size blocks of text without reading the whole input into memory
+def _blocks(infile, block_size):
+    while True:
+        block = infile.read(block_size)
+        if block == '':
+            return
+        yield block
+
+
+# Yields lines without their line ending (one record per line)
+def _records(infile):
+    for line in infile:
+        yield line.rstrip('\r\n')
+
+
+def _encrypt_command(args):
+    key = _read_key(args)
+    fxn = functools.partial(encrypt, key=key, version=args.version, compress=args.compress, level=args.level)
+
+    with _open_input(args.input, args.encoding) as infile, _open_output(args.output, 'ascii') as outfile:
+        # Block mode encrypts the whole input as a single cipher (its radix conversion spread over the workers)
+        if args.mode == 'block':
+            outfile.write(fxn(infile.read(), workers=args.workers) + '\n')
+            return
+
+        # Stream mode encrypts fixed-size blocks, and lines mode encrypts each line; either way, one cipher per line
+        items = _blocks(infile, args.block_size) if args.mode == 'stream' else _records(infile)
+        for cipher in ordered_map(fxn, items, args.workers, RECORDS_PER_WORKER):
+            outfile.write(cipher + '\n')
+
+
+def _decrypt_command(args):
+    key = _read_key(args)
+    fxn = functools.partial(decrypt, key=key, version=args.version)
+
+    with _open_input(args.input, 'ascii') as infile, _open_output(args.output, args.encoding) as outfile:
+        if args.mode == 'block':
+            outfile.write(fxn(infile.read().strip(), workers=args.workers))
+            return
+
+        # Stream mode joins the decrypted blocks back together, and lines mode writes one record per line
+        end = '' if args.mode == 'stream' else '\n'
+        for plaintext in ordered_map(fxn, _records(infile), args.workers, RECORDS_PER_WORKER):
+            outfile.write(plaintext + end)
+
+
+def _keygen_command(args):
+    seed = args.seed
+    if seed is not None and seed.lstrip('-').isdigit():
+        seed = int(seed)
+
+    with _open_output(args.output, 'ascii') as outfile:
+        outfile.write(generate_key(seed) + '\n')
+
+
+def _bench_command(args):
+    # Imported here since benchmarks are rarely needed from the command line
+    from benchmark import cipher_size_report, import_time_test
+
+    if args.imports:
+        if not import_time_test(args.limit):
+            sys.exit(1)
+    else:
+        cipher_size_report(args.length)
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be a positive integer ({value} given)')
+    return number
+
+
+def build_parser():
+    """Returns the argument parser of the command-line tool."""
+
+    parser = argparse.ArgumentParser(prog='dre94', description='DRE.94 private key text encryption.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # Options shared by encrypt and decrypt
+    io_parser = argparse.ArgumentParser(add_help=False)
+    io_parser.add_argument('-i', '--input', help='input file (default: stdin)')
+    io_parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    key_group = io_parser.add_mutually_exclusive_group(required=True)
+    key_group.add_argument('-k', '--key', help='DRE.94 key (prefer --key-file; command lines are visible to others)')
+    key_group.add_argument('-K', '--key-file', help='file containing the DRE.94 key')
+    io_parser.add_argument('-m', '--mode', choices=['block', 'stream', 'lines'], default='block',
+                           help='block: whole input is one message; stream: fixed-size blocks, one cipher per line; '
+                                'lines: one record per line, line endings written as \\n (default: block)')
+    io_parser.add_argument('-b', '--block-size', type=_positive_int, default=BLOCK_SIZE,
+                           help=f'characters per block in stream mode (default: {BLOCK_SIZE})')
+    io_parser.add_argument('-w', '--workers', type=_positive_int, default=1,
+                           help='worker processes: records are spread over them in stream and lines modes, and the '
+                                'conversion of a huge message in block mode, with gmpy2 (default: 1)')
+    io_parser.add_argument('-v', '--version', type=int, choices=CIPHER_VERSIONS, default=1,
+                           help='cipher format version (default: 1)')
+    io_parser.add_argument('-e', '--encoding', default='utf-8', help='plaintext encoding (default: utf-8)')
+
+    encrypt_parser = subparsers.add_parser('encrypt', parents=[io_parser], help='encrypt text')
+    encrypt_parser.add_argument('-c', '--compress', choices=list(COMPRESSION_FLAGS),
+                                help='compress plaintext before encryption (cipher version 2 or higher)')
+    encrypt_parser.add_argument('-l', '--level', type=int, help='compression level')
+    encrypt_parser.set_defaults(run=_encrypt_command)
+
+    decrypt_parser = subparsers.add_parser('decrypt', parents=[io_parser], help='decrypt ciphertext')
+    decrypt_parser.set_defaults(run=_decrypt_command)
+
+    keygen_parser = subparsers.add_parser('keygen', help='generate a key')
+    keygen_parser.add_argument('-s', '--seed', help='integer or string seed (default: time-based)')
+    keygen_parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    keygen_parser.set_defaults(run=_keygen_command)
+
+    bench_parser = subparsers.add_parser('bench', help='benchmark cipher versions')
+    bench_parser.add_argument('-n', '--length', type=_positive_int, default=2000,
+                              help='length of sample plaintexts (default: 2000)')
+    bench_parser.add_argument('--imports', action='store_true',
+                              help='benchmark import time of the library instead (fails if over --limit)')
+    bench_parser.add_argument('--limit', type=float, default=0.05,
+                              help='import time limit in seconds (default: 0.05)')
+    bench_parser.set_defaults(run=_bench_command)
+
+    return parser
+
+
+def main(argv=None):
+    """Runs the command-line tool with the given arguments (default: sys.argv[1:])."""
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        args.run(args)
+    except (ValueError, TypeError, OSError) as e:
+        parser.exit(1, f'{parser.prog}: error: {e}\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,17 +8,20 @@ from datetime import datetime
 from DRE_94 import generate_key, encrypt, decrypt, encrypt_ASCII, decrypt_ASCII
 from global_constants import KEY_LENGTH, KEYSPACE_SIZE, NULL_CHAR
 from key_ops import get_keyspace, approx_loc_in_keyspace, get_int_seed
-from implicit import key_error_check, arg_check
-from radix import base94_to_base10
+from implicit import key_error_check, arg_check, version_check
+from radix import (
+    BACKENDS, base94_to_base10, base10_to_base94, baseN_to_base10, base10_to_baseN, get_backend, set_backend
+)
 
 
 # Tests reliability of algorithm by checking if decrypted values match original values, for any number of trials
-def reliance_test(trials=10, ascii_mode=False, verbose=False):
+def reliance_test(trials=10, ascii_mode=False, verbose=False, version=1):
     """Tests reliability of algorithm by checking if decrypted strings match original
-    strings for any number of trials."""
+    strings for any number of trials (non-ASCII mode uses the given cipher version)."""
 
     arg_check(ascii_mode, 'ascii_mode', bool)
     arg_check(verbose, 'verbose', bool)
+    version_check(version)
 
     # If ASCII mode is on, use the ASCII functions
     if ascii_mode:
@@ -26,8 +29,8 @@ def reliance_test(trials=10, ascii_mode=False, verbose=False):
         dec = decrypt_ASCII
         ord_range = (32, 126)
     else:
-        enc = encrypt
-        dec = decrypt
+        def enc(text, key): return encrypt(text, key, version=version)
+        def dec(cipher, key): return decrypt(cipher, key, version=version)
         ord_range = (1, 500)
 
     # If verbose is on, vprint is same as default print; if verbose is off, vprint is a do-nothing function
@@ -100,6 +103,70 @@ def reliance_test(trials=10, ascii_mode=False, verbose=False):
     return True
 
 
+# Checks that every installed big-integer backend of radix gives the same conversions and the same ciphers
+def backend_equivalence_test(trials=10, max_bits=20000, verbose=False):
+    """Converts random integers (and encrypts random strings) with every installed big-integer backend of radix and
+    checks that all results are identical; backends that are not installed are skipped. Returns True or False (pass
+    or fail, respectively)."""
+
+    arg_check(trials, 'trials', int)
+    arg_check(max_bits, 'max_bits', int)
+    arg_check(verbose, 'verbose', bool)
+
+    # If verbose is on, vprint is same as default print; if verbose is off, vprint is a do-nothing function
+    if verbose:
+        vprint = print
+    else:
+        def vprint(*_args, **_kwargs): pass
+
+    symbol_sets = ['01', '0123456789', '0123456789 ', [chr(i) for i in range(300, 362)],
+                   [chr(i) for i in range(1000, 1094)]]
+
+    # Same inputs for every backend
+    integers = [0, 1, 93, 94] + [random.getrandbits(random.randint(1, max_bits)) for _ in range(trials)]
+    texts = [''.join(chr(random.randint(1, 500)) for _ in range(random.randint(1, 500))) for _ in range(trials)]
+    key = generate_key()
+
+    initial_backend = get_backend()
+    results = {}
+    success = True
+    try:
+        for backend in BACKENDS:
+            try:
+                set_backend(backend)
+            except ImportError:
+                vprint(f'{backend:<8} not installed, skipped')
+                continue
+
+            t1 = time.time()
+            outputs = []
+            for integer in integers:
+                base94 = base10_to_base94(integer)
+                outputs.append(base94)
+                success = success and base94_to_base10(base94) == integer
+
+                for symbol_set in symbol_sets:
+                    baseN = base10_to_baseN(integer, symbol_set)
+                    outputs.append(baseN)
+                    success = success and baseN_to_base10(baseN, symbol_set) == integer
+
+            for text in texts:
+                cipher = encrypt(text, key)
+                outputs.append(cipher)
+                success = success and decrypt(cipher, key) == text
+
+            results[backend] = outputs
+            vprint(f'{backend:<8} {time.time() - t1:.4f} seconds')
+    finally:
+        set_backend(initial_backend)
+
+    # Round trips must succeed, and every backend must give the same outputs as the built-in int backend
+    success = success and all(outputs == results['python'] for outputs in results.values())
+
+    vprint('Verdict:', 'PASS' if success else 'FAIL')
+    return success
+
+
 # Function that brute-forces DRE.94; user has the option to specify key used (strictly verbose)
 def brute_force(key=None, time_limit=None, verbose=True):
     """Function that brute-forces DRE.94; user has the option to specify key used. This
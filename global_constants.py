@@ -5,9 +5,15 @@ import math
 
 # Ordered string to be shuffled to generate key
 KEY_CHARSET = ''.join(chr(i) for i in range(33, 126 + 1))
+KEY_CHARSET_SET = frozenset(KEY_CHARSET)  # for membership tests
 
 PRINTABLE_ASCII = ''.join(chr(i) for i in list(range(9, 13+1)) + list(range(32, 126+1)))
 
+DECIMAL_DIGITS = '0123456789'
+
+# Every character that can appear in str(int) or repr(float), including 'inf' and 'nan' (used for numeric mode)
+NUMERIC_CHARSET = '0123456789+-.aefin'
+
 KEY_LENGTH = 94
 KEYSPACE_SIZE = math.factorial(KEY_LENGTH)  # if key length not equal to length of KEY_CHARMAP, must use permute(n,r)
 
@@ -20,3 +26,15 @@ M512 = 2**512 - 1
 # Null char takes the place of the 0th digit during encryption to ensure no leading zeros digits in plaintext
 # (leading zeros in plaintext vanish upon decryption)
 NULL_CHAR = '\0'
+
+# Supported cipher format versions (1 is the original format with a base-11 tag; 2 adds a binary header and tag;
+# 3 replaces the tag with sorted, delta-encoded ords)
+CIPHER_VERSIONS = (1, 2, 3)
+
+# Number of bits needed for any Unicode code point (max is 0x10FFFF), used for fixed-width ords in version 2 tags
+ORD_BITS = 21
+
+# Header flags of version 2+ ciphers marking compressed plaintext, by compression method
+COMPRESSION_FLAGS = {'zlib': 1, 'lzma': 2}
+COMPRESSION_MASK = 1 | 2
+
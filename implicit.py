@@ -1,10 +1,12 @@
 """Functions that are implicitly called by other modules; not intended for direct use by users."""
 
 
+import functools
 import os
-import traceback
+import sys
 
-from global_constants import KEY_LENGTH, KEY_CHARSET
+from collections import deque
+from global_constants import KEY_LENGTH, KEY_CHARSET_SET, CIPHER_VERSIONS, COMPRESSION_FLAGS
 from radix import base94_to_base10
 
 
@@ -12,20 +14,28 @@ from radix import base94_to_base10
 def driver_cwd(filename=None):
     """Returns the path to the directory containing the driver code that initially called the module."""
 
-    sep = os.path.join('_', '').lstrip('_')  # returns '\' or '/' depending on operating system
-    try:
-        dirpath = sep.join(traceback.extract_stack()[-3][0].split(sep)[:-1])
+    # The driver is the __main__ module; this is read from sys.modules rather than found by walking the call stack,
+    # which is far slower (and unaffected by how deep in a framework the library is called). Interactive sessions
+    # have no driver file, so the working directory is used instead
+    main_file = getattr(sys.modules.get('__main__'), '__file__', None)
+    dirpath = os.getcwd() if main_file is None else os.path.dirname(os.path.abspath(main_file))
 
-        # For example, if dirpath is built-in ipython console
-        if dirpath == '':
-            dirpath = sep.join(traceback.extract_stack()[-2][0].split(sep)[:-1])
+    # optional file arg; returns path to file in the calling directory
+    return dirpath if filename is None else os.path.join(dirpath, filename)
 
-    except IndexError:
-        # IndexError occurs if calling script is inside the DRE.94 library script (unlikely, but worth accounting for)
-        dirpath = sep.join(traceback.extract_stack()[-1][0].split(sep)[:-1])
 
-    # optional file arg; returns path to file in the calling directory
-    return dirpath if filename is None else sep.join([dirpath, filename])
+def resolve_path(path, base_dir=None):
+    """Resolves a file path (str or path-like object, such as pathlib.Path) for reading: absolute paths are kept,
+    relative paths are joined to 'base_dir' if given, else to the directory of the driver code (see driver_cwd)."""
+
+    path = os.fspath(path)
+    if os.path.isabs(path):
+        return path
+
+    if base_dir is None:
+        return driver_cwd(path)
+
+    return os.path.join(os.fspath(base_dir), path)
 
 
 # Meant to be called in the beginning of a function definition to check arguments for correct type
@@ -42,21 +52,69 @@ def arg_check(arg, argname, argtypes):
         raise TypeError(msg)
 
 
+# Key number (base-94 key to base-10 integer) is needed several times per encryption, so it is cached per key
+@functools.lru_cache(maxsize=256)
+def key_number(key):
+    """Returns the key number of a DRE.94 key (base-94 key to base-10 integer)."""
+
+    return base94_to_base10(key)
+
+
+# Below this length, removing items from a list (a C memmove, O(n) per removal) is still faster than the
+# order-statistic tree's O(log n) interpreted steps (measured crossover is around 70,000 items)
+FENWICK_THRESHOLD = 65536
+
+
+# Order in which a shuffle picks items from a sequence of the given length: at each step, the item at index
+# (key number mod number of remaining items) among the remaining items is picked. Cached per (key, length), since the
+# same symbol sets are shuffled over and over with the same key
+@functools.lru_cache(maxsize=256)
+def shuffle_order(key, length):
+    """Returns the tuple of indexes (into the original sequence) in the order a shuffle with 'key' picks them."""
+
+    key_num = key_number(key)
+    indexes = [key_num % size for size in range(length, 0, -1)]
+
+    if length <= FENWICK_THRESHOLD:
+        remaining = list(range(length))
+        return tuple(remaining.pop(idx) for idx in indexes)
+
+    # Fenwick tree over 'still remaining' flags (all 1 at first, so node i holds the size of its range, i & -i);
+    # finding the (idx+1)-th remaining item and removing it both take O(log n), instead of O(n) for list removal
+    tree = [i & -i for i in range(length + 1)]
+    top = 1 << (length.bit_length() - 1)
+
+    order = []
+    for idx in indexes:
+        # Descend from the largest power of 2, skipping whole ranges holding no more than the remaining count
+        pos = 0
+        count = idx + 1
+        step = top
+        while step:
+            nxt = pos + step
+            if nxt <= length and tree[nxt] < count:
+                pos = nxt
+                count -= tree[nxt]
+            step >>= 1
+
+        order.append(pos)
+
+        # Mark item as removed
+        i = pos + 1
+        while i <= length:
+            tree[i] -= 1
+            i += i & -i
+
+    return tuple(order)
+
+
 # Always returns a Python list
 def shuffle(seq, key):
     # This function is specific to DRE.94 keys
     key_error_check(key)
 
-    key_num = base94_to_base10(key)
-
     seq = list(seq)
-    shuffled = []
-    for size in range(len(seq), 0, -1):
-        idx = key_num % size
-        shuffled.append(seq[idx])
-        del seq[idx]
-
-    return shuffled
+    return [seq[idx] for idx in shuffle_order(key, len(seq))]
 
 
 # Shuffles base-11 symbol set (0123456789 + SPACE) with key as seed
@@ -65,7 +123,7 @@ def shuffle_base11(key):
 
     key_error_check(key)
 
-    key_num = base94_to_base10(key)
+    key_num = key_number(key)
     zeros = (' ', '0')
     zero = zeros[key_num % 2]
 
@@ -75,25 +133,128 @@ def shuffle_base11(key):
     return [zero] + symbol_set
 
 
-def key_error_check(key):
-    """Checks if argument 'key' is a valid DRE.94 key, and raises error with specific reason if not."""
+# Keys that already passed validation; most programs use a handful of keys, so repeat checks are a single set lookup
+# (the set is cleared once it reaches VALID_KEYS_LIMIT, so that it can not grow without bound)
+_valid_keys = set()
+VALID_KEYS_LIMIT = 1024
 
-    msg = "input for argument 'key' is not a valid DRE.94 key (reason: {})"
+
+def key_problem(key):
+    """Validates a DRE.94 key; returns None if 'key' is valid, otherwise the exception type and the reason why it is
+    not (shared by key_error_check and key_ops.is_key)."""
 
     # Check that key is of type str (if key is represented as list or tuple, problems occur in encryption/decryption)
     if type(key) != str:
-        raise TypeError(msg.format("DRE.94 key must be represented as a string (type str)"))
+        return TypeError, "DRE.94 key must be represented as a string (type str)"
+
+    if key in _valid_keys:
+        return None
 
     # Check for correct key length
     if len(key) != KEY_LENGTH:
-        raise ValueError(msg.format(f"DRE.94 key must be of length {KEY_LENGTH}"))
+        return ValueError, f"DRE.94 key must be of length {KEY_LENGTH}"
 
-    # Check for character uniqueness
-    for ch in key:
-        if key.count(ch) != 1:
-            raise ValueError(msg.format(f"DRE.94 key must contain only distinct characters"))
+    # Check for character uniqueness (with correct length, all characters are distinct iff the set has KEY_LENGTH)
+    chars = set(key)
+    if len(chars) != KEY_LENGTH:
+        return ValueError, "DRE.94 key must contain only distinct characters"
 
     # Check that key uses KEY_CHARMAP characters (ASCII 33 to 126)
-    for ch in key:
-        if ch not in KEY_CHARSET:
-            raise ValueError(msg.format(f"DRE.94 key must contain only ASCII characters 33 to 126, inclusive"))
+    if not chars <= KEY_CHARSET_SET:
+        return ValueError, "DRE.94 key must contain only ASCII characters 33 to 126, inclusive"
+
+    if len(_valid_keys) >= VALID_KEYS_LIMIT:
+        _valid_keys.clear()
+    _valid_keys.add(key)
+
+    return None
+
+
+def key_error_check(key):
+    """Checks if argument 'key' is a valid DRE.94 key, and raises error with specific reason if not."""
+
+    problem = key_problem(key)
+    if problem is not None:
+        error, reason = problem
+        msg = f"input for argument 'key' is not a valid DRE.94 key (reason: {reason})"
+        raise error(msg)
+
+
+def version_check(version):
+    """Checks if argument 'version' is a supported DRE.94 cipher format version, and raises error if not."""
+
+    arg_check(version, 'version', int)
+
+    if version not in CIPHER_VERSIONS:
+        msg = f'unsupported DRE.94 cipher version {version} (supported versions are {CIPHER_VERSIONS})'
+        raise ValueError(msg)
+
+
+def compression_check(compress, level, version):
+    """Checks if arguments 'compress' and 'level' are a supported compression method and level for a cipher of
+    'version', and raises error if not."""
+
+    if compress is None:
+        return
+
+    if compress not in COMPRESSION_FLAGS:
+        msg = f"unsupported compression '{compress}' (supported methods are {', '.join(COMPRESSION_FLAGS)})"
+        raise ValueError(msg)
+
+    if version < 2:
+        msg = 'compression requires a cipher version of 2 or higher (version 1 has no header to flag it)'
+        raise ValueError(msg)
+
+    if level is not None:
+        arg_check(level, 'level', int)
+
+        # zlib takes levels -1 (its default) to 9, lzma presets 0 to 9
+        low = -1 if compress == 'zlib' else 0
+        if not low <= level <= 9:
+            msg = f'invalid {compress} compression level {level} (must be from {low} to 9)'
+            raise ValueError(msg)
+
+
+def worker_pool(workers):
+    """Returns a pool of 'workers' worker processes (a concurrent.futures.ProcessPoolExecutor)."""
+
+    # Imported here, since it pulls in multiprocessing (slow to import) and is only needed with several workers
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(workers)
+
+
+# Applies fxn to a chunk of items in a worker process (module-level so that it can be sent to worker processes)
+def _map_chunk(fxn, chunk):
+    return [fxn(item) for item in chunk]
+
+
+def ordered_map(fxn, items, workers, chunk_size=1, executor=None):
+    """Yields fxn(item) for every item of the iterable 'items', in input order. If 'workers' > 1, the items are sent
+    to a pool of worker processes ('executor' if given, else a pool created for the duration of the map) in chunks of
+    'chunk_size', with at most 2 * workers chunks in flight, so that only a bounded number of items is pulled from
+    'items' (and held in memory) at a time; fxn and the items must then be picklable."""
+
+    if workers <= 1:
+        yield from map(fxn, items)
+        return
+
+    if executor is None:
+        with worker_pool(workers) as executor:
+            yield from ordered_map(fxn, items, workers, chunk_size, executor)
+        return
+
+    pending = deque()
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            pending.append(executor.submit(_map_chunk, fxn, chunk))
+            chunk = []
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+
+    if chunk:
+        pending.append(executor.submit(_map_chunk, fxn, chunk))
+    while pending:
+        yield from pending.popleft().result()
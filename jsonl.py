@@ -0,0 +1,165 @@
+"""Functions for encrypting and decrypting selected fields of JSON Lines streams (one JSON document per line)."""
+
+
+import functools
+import json
+import os
+import re
+
+from DRE_94 import encrypt, decrypt
+from implicit import key_error_check, arg_check, version_check, ordered_map
+from misc import CipherWriter
+
+# Default number of lines handed to a worker process at a time
+BATCH_LINES = 256
+
+# One step of a field path: a key (up to the next '.' or '['), or an array index in brackets ('*' for every element)
+_PATH_STEP = re.compile(r'\.?([^.\[\]]+)|\[(\*|\d+)\]')
+
+
+# Splits a field path such as 'user.email' or 'items[*].name' into its steps (keys as str, indexes as int, '*' as None)
+def _parse_path(path):
+    arg_check(path, 'field path', str)
+
+    steps = []
+    position = 0
+    while position < len(path):
+        match = _PATH_STEP.match(path, position)
+        if match is None or (position == 0 and path.startswith('.')):
+            msg = f"invalid field path '{path}' (e.g. 'user.email' or 'items[*].name')"
+            raise ValueError(msg)
+
+        key, index = match.groups()
+        if key is not None:
+            steps.append(key)
+        else:
+            steps.append(None if index == '*' else int(index))
+        position = match.end()
+
+    if not steps:
+        msg = 'field path must not be empty'
+        raise ValueError(msg)
+
+    return steps
+
+
+# Replaces every value found at the given path (missing keys and indexes are skipped) with convert(value)
+def _convert_path(document, steps, convert):
+    step, rest = steps[0], steps[1:]
+
+    if isinstance(step, str):
+        if not isinstance(document, dict) or step not in document:
+            return
+        targets = [step]
+    elif not isinstance(document, list):
+        return
+    elif step is None:
+        targets = range(len(document))
+    elif step < len(document):
+        targets = [step]
+    else:
+        return
+
+    for target in targets:
+        if rest:
+            _convert_path(document[target], rest, convert)
+        else:
+            document[target] = convert(document[target])
+
+
+# Encrypts/decrypts the fields of a line, given as (line number, line), for error messages (module-level so that it
+# can be sent to worker processes); blank lines are kept as they are
+def _process_line(numbered_line, encrypting, key, paths, options):
+    number, line = numbered_line
+    if not line.strip():
+        return line
+
+    if encrypting:
+        # Values are encrypted as JSON text, so that numbers, booleans, nulls, arrays and objects keep their type
+        def convert(value):
+            return encrypt(json.dumps(value, ensure_ascii=False), key, **options)
+    else:
+        def convert(value):
+            if not isinstance(value, str):
+                msg = f'encrypted field must be a string cipher, not {type(value).__name__}'
+                raise ValueError(msg)
+            return json.loads(decrypt(value, key, **options))
+
+    try:
+        document = json.loads(line)
+        for steps in paths:
+            _convert_path(document, steps, convert)
+    except ValueError as e:
+        msg = f'line {number}: {e}'
+        raise ValueError(msg) from e
+
+    return json.dumps(document, ensure_ascii=False) + '\n'
+
+
+# Checks the arguments (before any line is read, rather than upon the first iteration) and returns the generator of
+# processed lines
+def _process_stream(lines, encrypting, key, fields, workers, batch_size, options):
+    key_error_check(key)
+    arg_check(batch_size, 'batch_size', int)
+    if workers is not None:
+        arg_check(workers, 'workers', int)
+    if batch_size < 1:
+        msg = f"argument 'batch_size' must be at least 1 ({batch_size} given)"
+        raise ValueError(msg)
+
+    paths = [_parse_path(field) for field in ([fields] if isinstance(fields, str) else fields)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Batches of lines are spread over the worker processes (if more than 1) in order, with a bounded number in
+    # flight, so that memory use does not depend on the length of the stream
+    fxn = functools.partial(_process_line, encrypting=encrypting, key=key, paths=paths, options=options)
+    return ordered_map(fxn, enumerate(lines, 1), workers, batch_size)
+
+
+def encrypt_jsonl_lines(lines, key, fields, workers=1, batch_size=BATCH_LINES, version=1, compress=None,
+                        level=None):
+    """Returns a generator that encrypts the given fields of each line of a JSON Lines stream (any iterable of lines,
+    e.g. an open file) and yields the resulting lines. 'fields' is a field path or a list of them, such as
+    'user.email' or 'items[*].name' ('[*]' selects every element of an array, '[0]' the first); each value found is
+    replaced by the cipher of its JSON text (see DRE_94.encrypt), and documents missing a field are left as they are.
+    Lines are processed in batches of 'batch_size', spread over 'workers' processes if more than 1."""
+
+    version_check(version)
+    options = {'version': version, 'compress': compress, 'level': level}
+    return _process_stream(lines, True, key, fields, workers, batch_size, options)
+
+
+def decrypt_jsonl_lines(lines, key, fields, workers=1, batch_size=BATCH_LINES, version=1):
+    """Returns a generator that decrypts the given fields of each line of a JSON Lines stream encrypted by
+    encrypt_jsonl_lines, restoring the original values (with their types); takes the same arguments."""
+
+    version_check(version)
+    return _process_stream(lines, False, key, fields, workers, batch_size, {'version': version})
+
+
+def encrypt_jsonl(source, destination, key, fields, workers=None, batch_size=BATCH_LINES, version=1, compress=None,
+                  level=None):
+    """Encrypts the given fields of the JSON Lines file 'source' into the file 'destination' (see encrypt_jsonl_lines),
+    one line at a time, with batches spread over 'workers' processes (default: number of CPUs). The output is written
+    atomically. Returns the number of lines written."""
+
+    with open(source, encoding='utf-8') as lines, CipherWriter(destination, encoding='utf-8') as writer:
+        count = 0
+        for line in encrypt_jsonl_lines(lines, key, fields, workers, batch_size, version, compress, level):
+            writer.write(line)
+            count += 1
+    return count
+
+
+def decrypt_jsonl(source, destination, key, fields, workers=None, batch_size=BATCH_LINES, version=1):
+    """Decrypts the given fields of the JSON Lines file 'source' (encrypted by encrypt_jsonl) into the file
+    'destination'; works like encrypt_jsonl."""
+
+    with open(source, encoding='utf-8') as lines, CipherWriter(destination, encoding='utf-8') as writer:
+        count = 0
+        for line in decrypt_jsonl_lines(lines, key, fields, workers, batch_size, version):
+            writer.write(line)
+            count += 1
+    return count
@@ -3,31 +3,14 @@
 import itertools
 from global_constants import KEY_LENGTH, KEY_CHARSET, M512
 from radix import base94_to_base10
-from implicit import key_error_check
+from implicit import key_error_check, key_problem
 
 
 def is_key(key):
     """Checks if a string is a valid DRE.94 key (will not accept any other iterable besides str); returns True or False."""
 
-    # Check that key is of type str (if key is represented as list or tuple, problems occur in encryption/decryption)
-    if type(key) != str:
-        return False
-
-    # Check for correct key length
-    if len(key) != KEY_LENGTH:
-        return False
-
-    # Check for character uniqueness
-    for ch in key:
-        if key.count(ch) != 1:
-            return False
-
-    # Check that key uses KEY_CHARMAP characters (ASCII 33 to 126)
-    for ch in key:
-        if ch not in KEY_CHARSET:
-            return False
-
-    return True
+    # Same validation as key_error_check (type str, length, distinct characters, ASCII 33 to 126)
+    return key_problem(key) is None
 
 
 def approx_loc_in_keyspace(key):
@@ -1,13 +1,111 @@
 """Miscellaneous functions."""
 
 
+import os
+
+# Default number of characters buffered by CipherWriter before they are written to the file
+BUFFER_SIZE = 1 << 20
+
+
+# Creates a temp file in the directory of 'file' (renaming it over 'file' is then atomic, being on the same file
+# system); a new file is created with the permissions open() would give it (0o666 less the umask, applied by the
+# OS, so the process umask is never changed), and an existing file's permissions are carried over
+def temp_file_for(file):
+    """Creates a temp file to be renamed over 'file' once written; returns its file descriptor (open for writing) and
+    path."""
+
+    directory = os.path.dirname(os.path.abspath(file))
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+
+    while True:
+        temp_path = os.path.join(directory, f'.{os.urandom(8).hex()}.tmp')
+        try:
+            fd = os.open(temp_path, flags, 0o666)
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        os.chmod(temp_path, os.stat(file).st_mode & 0o7777)
+    except FileNotFoundError:
+        pass
+
+    return fd, temp_path
+
+
 # Ciphers/keys/text can be saved manually in any text format, but this method expedites the saving process
 def save(string, file):
-    """Saves ciphers or keys or any text to the given file path; more efficient than manual saving."""
+    """Saves ciphers or keys or any text to the given file path; more efficient than manual saving. The file is
+    written atomically (to a temp file that is flushed to disk, then renamed over 'file'), so a crash mid-write never
+    leaves a truncated file behind."""
+
+    with CipherWriter(file) as writer:
+        writer.write(string)
+
+
+class CipherWriter:
+    """Context manager that writes text to a file in incremental chunks, e.g. as the sink of streaming encryption.
+    Chunks are buffered up to 'buffer_size' characters before being written out, and the file only replaces 'file'
+    (atomically, as in save) once the context exits without error; on error, the partial output is discarded.
+    'encoding' and 'newline' are passed on to open()."""
+
+    def __init__(self, file, buffer_size=BUFFER_SIZE, encoding=None, newline=None):
+        if buffer_size < 1:
+            msg = f"argument 'buffer_size' must be at least 1 ({buffer_size} given)"
+            raise ValueError(msg)
+
+        self.file = os.fspath(file)
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self.newline = newline
+
+        self._buffer = []
+        self._buffered = 0
+        self._temp_file = None
+        self._temp_path = None
+
+    def __enter__(self):
+        fd, self._temp_path = temp_file_for(self.file)
+        self._temp_file = os.fdopen(fd, 'w', encoding=self.encoding, newline=self.newline)
+        return self
+
+    def write(self, chunk):
+        """Buffers a chunk of text, writing the buffer out once it holds at least 'buffer_size' characters."""
+
+        if self._temp_file is None:
+            msg = 'CipherWriter must be used as a context manager (with CipherWriter(file) as writer: ...)'
+            raise ValueError(msg)
+
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered chunks out to the temp file."""
+
+        self._temp_file.write(''.join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        replaced = False
+        try:
+            if exc_type is None:
+                self.flush()
+                self._temp_file.flush()
+                os.fsync(self._temp_file.fileno())
+                self._temp_file.close()
+                os.replace(self._temp_path, self.file)
+                replaced = True
+        finally:
+            # On error (inside the context or while finishing the file), discard the partial output
+            self._temp_file.close()
+            self._temp_file = None
+            if not replaced:
+                os.remove(self._temp_path)
 
-    save_file = open(file, 'w')
-    save_file.write(string)
-    save_file.close()
+        return False
 
 
 # Returns number of permutations of size r from population n; accurate for very large integers, unlike n! / (n-r)!
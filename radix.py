@@ -1,60 +1,330 @@
 """Functions for base conversion."""
 
 
+import threading
+
+from collections import OrderedDict
+from functools import lru_cache
+
 from global_constants import KEY_CHARSET
 
+# Big-integer backends: 'python' (built-in int) and 'gmpy2' (GMP through the optional gmpy2 package)
+BACKENDS = ('python', 'gmpy2')
 
-# Converts base-10 integer to base-94 representation with KEY_CHARMAP as fixed numbering system
-def base10_to_base94(integer: int) -> str:
-    """Converts base-10 integer to base-94 string representation, using ASCII characters 33 to 126 as symbol set."""
+# Digit characters of GMP's string conversions, for bases up to 36 and up to 62 respectively
+GMP_DIGITS_36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+GMP_DIGITS_62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
 
-    symbol_set = KEY_CHARSET
-    base = 94
+# Byte translation tables from GMP's digit characters to digit values, for bases up to 36 and up to 62 respectively
+_GMP_VALUES_36 = bytes.maketrans(GMP_DIGITS_36.encode('ascii'), bytes(range(36)))
+_GMP_VALUES_62 = bytes.maketrans(GMP_DIGITS_62.encode('ascii'), bytes(range(62)))
 
-    # Negative forbidden to eliminate symbol ambiguity
-    if integer < 0:
-        msg = 'input for base-10 integer cannot be negative'
-        raise ValueError(msg)
-    elif integer == 0:
-        return symbol_set[0]
+# Digit sequences up to this length are evaluated with Horner's rule; longer ones are split in halves (see below)
+HORNER_LIMIT = 64
 
-    bits = []
-    while integer > 0:
-        bit = symbol_set[integer % base]
-        bits.append(bit)
-        integer //= base
+# Integers of up to this many bits are converted to digits by repeated division by the base; larger ones are split
+SPLIT_BITS = 512
 
-    return ''.join(reversed(bits))
+# Power tables (base ** (2 ** i) for i = 0, 1, 2, ...) are cached for this many bases, least recently used dropped
+POWER_TABLE_BASES = 32
 
+# Powers larger than this many bits are not cached (they are as large as the messages that need them)
+POWER_CACHE_BITS = 1 << 20
 
-# Converts base-94 representation to base-10 integer; only takes string whose characters exist in KEY_CHARMAP
-def base94_to_base10(base94: str) -> int:
-    """Converts base-94 string representation to base-10 integer, using ASCII characters 33 to 126 as symbol set."""
+# Integers of at least this many bits are converted to digits in worker processes, if workers are requested and the
+# gmpy2 backend is in use (with built-in ints, the first division alone is most of the conversion and cannot be split,
+# which bounds the speedup to about 1.3x, less than the cost of sending the parts between processes)
+PARALLEL_BITS = 1 << 21
 
-    result = 0
-    length = len(base94)
+_power_tables = OrderedDict()
+_power_tables_lock = threading.Lock()
 
-    try:
-        i = 0
-        for digit in base94:
-            pos = (length-1) - i
-            denomination = KEY_CHARSET.index(digit)
-            result += denomination * (94 ** pos)
-            i += 1
+# Selected backend (resolved upon first conversion, see _get_mpz) and gmpy2's mpz type if that backend is in use
+_backend = None
+_mpz = None
 
-    # This is not checked before iteration to avoid having to iterate twice; just check during first iteration
-    except ValueError:
-        msg = "input for base-94 representation contains character(s) not included in preset symbol set " \
-                "(ASCII codes 33 to 126)"
+# Digit value of each key character, for base-94 conversions with the preset symbol set
+_KEY_CHARSET_INDEX = {ch: i for i, ch in enumerate(KEY_CHARSET)}
+
+
+def set_backend(name=None):
+    """Selects the big-integer backend used by all conversions: 'python' or 'gmpy2' (GMP's subquadratic arithmetic,
+    requires the gmpy2 package); None selects gmpy2 if it is installed, otherwise python. Results are identical."""
+
+    global _backend, _mpz
+
+    if name is None:
+        try:
+            import gmpy2
+        except ImportError:
+            name = 'python'
+        else:
+            name = 'gmpy2'
+
+    if name not in BACKENDS:
+        msg = f"invalid backend '{name}' (must be one of: {', '.join(BACKENDS)})"
         raise ValueError(msg)
 
+    if name == 'gmpy2':
+        import gmpy2  # raises ImportError if not installed
+        _mpz = gmpy2.mpz
+    else:
+        _mpz = None
+
+    # Cached power tables hold numbers of the previous backend's type
+    with _power_tables_lock:
+        _power_tables.clear()
+    _gmp_tables.cache_clear()
+    _backend = name
+
+
+def get_backend():
+    """Returns the name of the big-integer backend in use (see set_backend)."""
+
+    if _backend is None:
+        set_backend()
+    return _backend
+
+
+# Returns gmpy2's mpz type if the gmpy2 backend is in use, otherwise None; gmpy2 is only imported upon first conversion
+def _get_mpz():
+    if _backend is None:
+        set_backend()
+    return _mpz
+
+
+# Translation tables between a symbol set of single characters and GMP's digit characters of the same base, if
+# the base is supported by GMP's string conversions (2 to 62); returns None otherwise
+@lru_cache(maxsize=64)
+def _gmp_tables(symbols):
+    if len(symbols) > 62 or not all(isinstance(ch, str) and len(ch) == 1 for ch in symbols):
+        return None
+
+    gmp_digits = GMP_DIGITS_36 if len(symbols) <= 36 else GMP_DIGITS_62
+    to_symbols = str.maketrans(dict(zip(gmp_digits, symbols)))
+    to_gmp = str.maketrans(dict(zip(symbols, gmp_digits)))
+    return to_symbols, to_gmp
+
+
+# Returns the power table of a base: table[i] = base ** (2 ** i), for every i up to 'levels' and every power not above
+# 'integer' (so both conversions below can split their input at any level). Tables are shared across calls (and
+# threads): a cached table is a tuple that is never modified, only replaced by a longer one, and the cache itself is
+# only touched under _power_tables_lock. Only powers up to POWER_CACHE_BITS bits are kept in the cache
+def _power_table(base, levels=0, integer=0):
+    with _power_tables_lock:
+        table = _power_tables.get(base)
+        if table is not None:
+            _power_tables.move_to_end(base)
+
+    if table is None:
+        mpz = _get_mpz()
+        table = (base if mpz is None else mpz(base),)
+        cached = 0
+    else:
+        cached = len(table)
+
+    # The square of the last power has at least 2 * bits - 1 bits, so it is only needed if 'integer' has that many
+    if len(table) <= levels or 2 * table[-1].bit_length() - 1 <= integer.bit_length():
+        table = list(table)
+        while len(table) <= levels or 2 * table[-1].bit_length() - 1 <= integer.bit_length():
+            table.append(table[-1] * table[-1])
+        table = tuple(table)
+
+    # Publishes the table (up to the largest power that is cached) unless another thread cached a longer one meanwhile
+    keep = len(table)
+    while keep > 1 and table[keep - 1].bit_length() > POWER_CACHE_BITS:
+        keep -= 1
+    if keep > cached:
+        with _power_tables_lock:
+            current = _power_tables.get(base)
+            if current is None or len(current) < keep:
+                _power_tables[base] = table[:keep]
+                _power_tables.move_to_end(base)
+                if len(_power_tables) > POWER_TABLE_BASES:
+                    _power_tables.popitem(last=False)
+
+    return table
+
+
+# Horner's rule over digits[lo:hi]
+def _horner(digits, base, lo, hi):
+    result = 0
+    for i in range(lo, hi):
+        result = result * base + digits[i]
     return result
 
 
-# Converts base-10 integer to base-N representation; supports arbitrary numbering system
-def base10_to_baseN(integer, symbol_set):
-    """Converts base-10 integer to arbitrary base-N string representation; user specifies symbol set (of length N)."""
+# Divide and conquer over digits[lo:hi]: the lowest 2 ** level digits (largest power of 2 below the length) form the
+# low half, and the high half is scaled by base ** (2 ** level) from the power table
+def _from_digits(digits, base, table, lo, hi):
+    length = hi - lo
+    if length <= HORNER_LIMIT:
+        return _horner(digits, base, lo, hi)
+
+    level = (length - 1).bit_length() - 1
+    mid = hi - (1 << level)
+
+    high = _from_digits(digits, base, table, lo, mid)
+    low = _from_digits(digits, base, table, mid, hi)
+    return high * table[level] + low
+
+
+# Appends exactly 2 ** level digits of 'integer' (which is below base ** (2 ** level)) to 'out', with leading zeros
+def _to_digits_padded(integer, base, table, level, out):
+    if level == 0 or table[level].bit_length() <= SPLIT_BITS:
+        integer = int(integer)  # small enough for built-in int, whatever the backend
+        digits = []
+        for _ in range(1 << level):
+            integer, digit = divmod(integer, base)
+            digits.append(digit)
+        out.extend(reversed(digits))
+        return
+
+    high, low = divmod(integer, table[level - 1])
+    _to_digits_padded(high, base, table, level - 1, out)
+    _to_digits_padded(low, base, table, level - 1, out)
+
+
+# Appends the digits of 'integer' (no leading zeros) to 'out'
+def _to_digits(integer, base, table, out):
+    # Largest level whose power does not exceed integer
+    level = 0
+    while level + 1 < len(table) and table[level + 1] <= integer:
+        level += 1
+
+    if integer.bit_length() <= SPLIT_BITS or integer < table[0]:
+        integer = int(integer)  # small enough for built-in int, whatever the backend
+        digits = []
+        while integer > 0:
+            integer, digit = divmod(integer, base)
+            digits.append(digit)
+        out.extend(reversed(digits))
+        return
+
+    high, low = divmod(integer, table[level])
+    _to_digits(high, base, table, out)
+    _to_digits_padded(low, base, table, level, out)
+
+
+# Splits 'integer' once, as the recursion of _to_digits ('level' None) or _to_digits_padded (the given level) would;
+# returns the two parts as (integer, level) pairs, in order, or None if the recursion would not split it
+def _split_once(integer, table, level):
+    if level is None:
+        if integer.bit_length() <= SPLIT_BITS or integer < table[0]:
+            return None
+
+        top = 0
+        while top + 1 < len(table) and table[top + 1] <= integer:
+            top += 1
+
+        high, low = divmod(integer, table[top])
+        return [(high, None), (low, top)]
+
+    if level == 0 or table[level].bit_length() <= SPLIT_BITS:
+        return None
+
+    high, low = divmod(integer, table[level - 1])
+    return [(high, level - 1), (low, level - 1)]
+
+
+# Worker for one part of a parallel conversion (module-level so that it can be sent to worker processes): with 'split'
+# set, returns ('split', parts) if the part can be split (see _split_once), otherwise converts it and returns
+# ('digits', digits); digits are returned as bytes where possible, since they are much cheaper to send back
+def _convert_part(integer, base, level, split=False):
+    mpz = _get_mpz()
+    if mpz is not None:
+        integer = mpz(integer)
+
+    table = _power_table(base, integer=integer) if level is None else _power_table(base, levels=level)
+
+    if split:
+        parts = _split_once(integer, table, level)
+        if parts is not None:
+            return 'split', parts
 
+    # Bases up to 62 are converted by GMP directly
+    if mpz is not None and base <= 62:
+        digits = integer.digits(base).encode('ascii').translate(_GMP_VALUES_36 if base <= 36 else _GMP_VALUES_62)
+        return 'digits', digits if level is None else digits.rjust(1 << level, b'\0')
+
+    out = []
+    if level is None:
+        _to_digits(integer, base, table, out)
+    else:
+        _to_digits_padded(integer, base, table, level, out)
+
+    return 'digits', bytes(out) if base <= 256 else out
+
+
+# Converts 'integer' in 'workers' worker processes: every split of the top levels of the recursion is done by a worker
+# (the parts of a split are sent on to other workers as soon as it is done, without waiting for the other splits of
+# its level), then the parts (each a zero-padded run of digits, except the most significant one) are converted
+def _to_digits_parallel(integer, base, workers):
+    depth = (workers - 1).bit_length() + 1
+
+    # Imported on first use, as in implicit.worker_pool (which radix cannot use, since implicit imports radix)
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    with ProcessPoolExecutor(workers) as executor:
+        # Parts in order, as [future, levels of splitting left]
+        def submit(part, level, splits):
+            return [executor.submit(_convert_part, part, base, level, splits > 0), splits]
+
+        nodes = [submit(integer, None, depth)]
+        while any(splits > 0 for _, splits in nodes):
+            done, _ = wait([future for future, splits in nodes if splits > 0], return_when=FIRST_COMPLETED)
+
+            next_nodes = []
+            for node in nodes:
+                future, splits = node
+                if future in done:
+                    kind, result = future.result()
+                    if kind == 'split':
+                        next_nodes.extend(submit(part, level, splits - 1) for part, level in result)
+                        continue
+                    node[1] = 0  # already converted
+                next_nodes.append(node)
+            nodes = next_nodes
+
+        out = []
+        for future, _ in nodes:
+            out.extend(future.result()[1])
+
+    return out
+
+
+def digits_to_base10(digits, base):
+    """Converts a sequence of digit values (most significant first, each below 'base') to base-10 integer."""
+
+    if len(digits) <= HORNER_LIMIT:
+        return _horner(digits, base, 0, len(digits))
+
+    table = _power_table(base, levels=(len(digits) - 1).bit_length() - 1)
+    return int(_from_digits(digits, base, table, 0, len(digits)))
+
+
+def base10_to_digits(integer, base, workers=None):
+    """Converts non-negative base-10 integer to a list of digit values in the given base (most significant first).
+    With workers > 1 and the gmpy2 backend, integers of at least PARALLEL_BITS bits are split and converted in that
+    many worker processes."""
+
+    if integer == 0:
+        return [0]
+
+    mpz = _get_mpz()
+    if mpz is not None:
+        integer = mpz(integer)
+
+    if mpz is not None and workers is not None and workers > 1 and integer.bit_length() >= PARALLEL_BITS:
+        return _to_digits_parallel(integer, base, workers)
+
+    out = []
+    _to_digits(integer, base, _power_table(base, integer=integer), out)
+    return out
+
+
+# Maps each symbol to its digit value; checks that the symbol set has at least 2 symbols, all distinct
+def _symbol_index(symbol_set):
     symbol_set = list(symbol_set)
     base = len(symbol_set)
 
@@ -64,58 +334,90 @@ def base10_to_baseN(integer, symbol_set):
         raise ValueError(msg)
 
     # Check for symbol uniqueness
-    for ch in symbol_set:
-        if symbol_set.count(ch) != 1:
-            msg = 'all characters in symbol set must be distinct'
-            raise ValueError(msg)
+    index = {ch: i for i, ch in enumerate(symbol_set)}
+    if len(index) != base:
+        msg = 'all characters in symbol set must be distinct'
+        raise ValueError(msg)
+
+    return symbol_set, index
+
+
+# Converts base-10 integer to base-94 representation with KEY_CHARMAP as fixed numbering system
+def base10_to_base94(integer: int, workers=None) -> str:
+    """Converts base-10 integer to base-94 string representation, using ASCII characters 33 to 126 as symbol set
+    (see base10_to_digits for 'workers')."""
 
     # Negative forbidden to eliminate symbol ambiguity
     if integer < 0:
         msg = 'input for base-10 integer cannot be negative'
         raise ValueError(msg)
-    elif integer == 0:
-        return symbol_set[0]
 
-    bits = []
-    while integer > 0:
-        bit = symbol_set[integer % base]
-        bits.append(bit)
-        integer //= base
+    return ''.join([KEY_CHARSET[digit] for digit in base10_to_digits(integer, 94, workers)])
 
-    return ''.join(reversed(bits))
+
+# Converts base-94 representation to base-10 integer; only takes string whose characters exist in KEY_CHARMAP
+def base94_to_base10(base94: str) -> int:
+    """Converts base-94 string representation to base-10 integer, using ASCII characters 33 to 126 as symbol set."""
+
+    try:
+        digits = [_KEY_CHARSET_INDEX[digit] for digit in base94]
+
+    # This is not checked before iteration to avoid having to iterate twice; just check during first iteration
+    except KeyError:
+        msg = "input for base-94 representation contains character(s) not included in preset symbol set " \
+                "(ASCII codes 33 to 126)"
+        raise ValueError(msg)
+
+    return digits_to_base10(digits, 94)
+
+
+# Converts base-10 integer to base-N representation; supports arbitrary numbering system
+def base10_to_baseN(integer, symbol_set, workers=None):
+    """Converts base-10 integer to arbitrary base-N string representation; user specifies symbol set (of length N).
+    With workers > 1, huge integers are converted in that many worker processes (see base10_to_digits)."""
+
+    symbol_set, _ = _symbol_index(symbol_set)
+
+    # Negative forbidden to eliminate symbol ambiguity
+    if integer < 0:
+        msg = 'input for base-10 integer cannot be negative'
+        raise ValueError(msg)
+
+    # With gmpy2, bases up to 62 are converted by GMP directly (in this process), then mapped from GMP's digits to the
+    # symbol set
+    mpz = _get_mpz()
+    parallel = workers is not None and workers > 1 and integer.bit_length() >= PARALLEL_BITS
+    if mpz is not None and integer.bit_length() > HORNER_LIMIT and not parallel:
+        tables = _gmp_tables(tuple(symbol_set))
+        if tables is not None:
+            return mpz(integer).digits(len(symbol_set)).translate(tables[0])
+
+    return ''.join([symbol_set[digit] for digit in base10_to_digits(integer, len(symbol_set), workers)])
 
 
 # Converts base-N representation to base-10 integer; supports arbitrary numbering system
 def baseN_to_base10(baseN, symbol_set):
     """Converts arbitrary base-N string representation to base-10 integer; user specifies symbol set (of length N)."""
 
-    symbol_set = list(symbol_set)
+    symbol_set, index = _symbol_index(symbol_set)
     N = len(symbol_set)  # N is old base
 
-    # Symbol set must contain at least 2 symbols (minimum base is 2)
-    if N in [0, 1]:
-        msg = f'symbol set must contain at least 2 symbols ({N} given)'
-        raise ValueError(msg)
+    # With gmpy2, bases up to 62 are converted by GMP directly, once the symbols are mapped to GMP's digits
+    mpz = _get_mpz()
+    if mpz is not None and isinstance(baseN, str) and len(baseN) > HORNER_LIMIT:
+        tables = _gmp_tables(tuple(symbol_set))
+        if tables is not None:
+            if not index.keys() >= set(baseN):
+                msg = f"input for base-{N} representation contains character(s) not included in given symbol set"
+                raise ValueError(msg)
+            return int(mpz(baseN.translate(tables[1]), N))
 
-    # Check for symbol uniqueness
-    for ch in symbol_set:
-        if symbol_set.count(ch) != 1:
-            msg = 'all characters in symbol set must be distinct'
-            raise ValueError(msg)
-
-    result = 0
-    length = len(baseN)
     try:
-        i = 0
-        for digit in baseN:
-            pos = (length-1) - i
-            denomination = symbol_set.index(digit)
-            result += denomination * (N ** pos)
-            i += 1
+        digits = [index[digit] for digit in baseN]
 
     # This is not checked before iteration to avoid having to iterate twice; just check during first iteration
-    except ValueError:
+    except KeyError:
         msg = f"input for base-{N} representation contains character(s) not included in given symbol set"
         raise ValueError(msg)
 
-    return result
+    return digits_to_base10(digits, N)
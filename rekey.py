@@ -0,0 +1,222 @@
+"""Key rotation of encrypted files: re-encrypts cipher files and encrypted CSV tables from an old key to a new one in a
+single streaming pass, without decrypting the whole file at once, and resumes from a checkpoint if interrupted."""
+
+
+import functools
+import hashlib
+import io
+import json
+import os
+
+from DRE_94 import encrypt, decrypt, encrypt_numeric, decrypt_numeric, cipher_compression
+from implicit import key_error_check, arg_check, version_check, ordered_map, worker_pool
+from tabular import read_tabular, load_schema, select_columns, SCHEMA_SUFFIX
+
+# Default number of records (lines of a cipher file, rows of a table) re-encrypted between two checkpoints
+CHUNK_RECORDS = 4096
+
+# Suffixes of the checkpoint sidecar and of the partial output, next to the destination, while a rekey is in progress
+CHECKPOINT_SUFFIX = '.rekey.json'
+PARTIAL_SUFFIX = '.rekey.part'
+
+
+# Pandas is imported when CSV files are first rekeyed rather than upon importing the module
+def _pandas():
+    import pandas
+    return pandas
+
+
+# Re-encrypts a cipher from old_key to new_key (module-level so that it can be sent to worker processes); compressed
+# ciphers are compressed again with the same method (at its default level, since the level is not recorded in the
+# cipher)
+def _rekey_value(cipher, mode, old_key, new_key, version):
+    if mode == 'numeric':
+        return encrypt_numeric(decrypt_numeric(cipher, old_key), new_key)
+    return encrypt(decrypt(cipher, old_key, version=version), new_key, version=version,
+                   compress=cipher_compression(cipher, old_key, version))
+
+
+# Re-encrypts a list of ciphers, spread over the worker pool if there is one (one chunk per worker); equal ciphers are
+# re-encrypted once
+def _rekey_list(executor, workers, ciphers, mode, old_key, new_key, version):
+    distinct = list(dict.fromkeys(ciphers))
+
+    fxn = functools.partial(_rekey_value, mode=mode, old_key=old_key, new_key=new_key, version=version)
+    chunk_size = max(1, -(-len(distinct) // workers))
+    rekeyed = ordered_map(fxn, distinct, workers, chunk_size, executor)
+
+    mapping = dict(zip(distinct, rekeyed))
+    return [mapping[cipher] for cipher in ciphers]
+
+
+# Identifies a rekey job, so that a checkpoint is only resumed by the same job on the same (unchanged) source; the
+# keys are only recorded as a hash
+def _job_id(source, old_key, new_key, version, columns):
+    stat = os.stat(source)
+    keys = hashlib.blake2b(f'{old_key}\0{new_key}'.encode('utf-8'), digest_size=16).hexdigest()
+    return {'source': os.path.abspath(source), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'keys': keys,
+            'version': version, 'columns': columns}
+
+
+# Writes the checkpoint sidecar atomically (temp file, then rename), so that a crash never leaves it half-written
+def _save_checkpoint(path, checkpoint):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temp_path, path)
+
+
+# Returns the number of records already done by an earlier run of the same job (0 if none), and the partial output
+# opened for appending after them
+def _resume(job, checkpoint_path, partial_path):
+    done = 0
+    written = 0
+    try:
+        with open(checkpoint_path) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        # (a checkpoint of 0 records, e.g. after only the header of a table, is not worth resuming)
+        if (checkpoint['job'] == job and checkpoint['records'] > 0
+                and os.path.getsize(partial_path) >= checkpoint['bytes']):
+            done = checkpoint['records']
+            written = checkpoint['bytes']
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    # Output written after the last checkpoint is discarded, since its records are done again
+    output = open(partial_path, 'r+b' if written else 'wb')
+    output.truncate(written)
+    output.seek(written)
+    return done, output
+
+
+# Yields the lines of a cipher file in chunks of re-encrypted text (as bytes), with the number of lines in each
+def _rekey_lines(source, done, chunk_size, rekey_list):
+    with open(source, encoding='utf-8', newline='') as lines:
+        for _ in zip(range(done), lines):
+            pass
+
+        while True:
+            chunk = [line for _, line in zip(range(chunk_size), lines)]
+            if not chunk:
+                return
+
+            # Blank lines and line endings are kept as they are
+            stripped = [line.rstrip('\r\n') for line in chunk]
+            ciphers = [line for line in stripped if line.strip()]
+            rekeyed = iter(rekey_list(ciphers, 'text'))
+            out = [(next(rekeyed) if text.strip() else text) + line[len(text):] for text, line in zip(stripped, chunk)]
+            yield ''.join(out).encode('utf-8'), len(chunk)
+
+
+# Yields the rows of an encrypted CSV table in chunks of re-encrypted CSV text (as bytes), with the number of rows in
+# each; every cell is read as raw text, so cells that are not re-encrypted are written back unchanged
+def _rekey_table(source, done, chunk_size, rekey_list, columns, modes, headers):
+    names = list(read_tabular(source, nrows=0).columns)
+    new_names = rekey_list([str(name) for name in names], 'text') if headers else names
+    converters = {name: str for name in names}
+
+    if done == 0:
+        yield _pandas().DataFrame(columns=new_names).to_csv(index=False).encode('utf-8'), 0
+
+    reader = _pandas().read_csv(source, converters=converters, chunksize=chunk_size, skiprows=lambda i: 0 < i <= done)
+    with reader:
+        for chunk in reader:
+            for name in columns:
+                chunk[name] = rekey_list(list(chunk[name]), modes.get(name, 'text'))
+            chunk.columns = new_names
+
+            text = io.StringIO()
+            chunk.to_csv(text, header=False, index=False)
+            yield text.getvalue().encode('utf-8'), len(chunk)
+
+
+def rekey(source, old_key, new_key, destination=None, columns=None, schema=None, workers=None,
+          chunk_size=CHUNK_RECORDS, version=1):
+    """Re-encrypts the file 'source' from 'old_key' to 'new_key' into 'destination' (default: replaces 'source'),
+    one chunk of 'chunk_size' records at a time: each cipher is decrypted and encrypted again right away, spread over
+    'workers' processes (default: number of CPUs), so the plaintext of the whole file is never held in memory.
+
+    CSV files are re-encrypted cell by cell: the encrypted columns are 'columns' if given, else those of the schema
+    record ('schema' if given, else the sidecar file of 'source', which is copied next to 'destination'), with their
+    cipher modes; without either, every cell and the column names are re-encrypted, as written by positional
+    encrypt_tabular_data. Any other file is a cipher file: each non-blank line is one cipher (of 'version'); a file
+    saved from a single cipher is one record.
+
+    Progress is checkpointed to a sidecar file next to 'destination' after every chunk; if the rekey is interrupted,
+    running it again with the same arguments resumes after the last checkpoint. The output only replaces
+    'destination' once complete. Returns the number of records re-encrypted (by this run)."""
+
+    key_error_check(old_key)
+    key_error_check(new_key)
+    version_check(version)
+    arg_check(chunk_size, 'chunk_size', int)
+    if workers is not None:
+        arg_check(workers, 'workers', int)
+    if chunk_size < 1:
+        msg = f"argument 'chunk_size' must be at least 1 ({chunk_size} given)"
+        raise ValueError(msg)
+
+    source = os.fspath(source)
+    destination = source if destination is None else os.fspath(destination)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    table = os.path.splitext(source)[1].lower() == '.csv'
+    if table:
+        names = list(read_tabular(source, nrows=0).columns)
+        entries = load_schema(source, _pandas().DataFrame(), schema)
+        headers = columns is None and not entries
+        if columns is None:
+            columns = [name for name in names if name in entries] if entries else names
+        columns = select_columns(columns, names)
+        modes = {name: entry.get('mode', 'text') for name, entry in entries.items()}
+    elif columns is not None:
+        msg = "keyword argument 'columns' only applies to CSV files"
+        raise ValueError(msg)
+
+    job = _job_id(source, old_key, new_key, version, columns)
+    checkpoint_path = destination + CHECKPOINT_SUFFIX
+    partial_path = destination + PARTIAL_SUFFIX
+
+    # One pool serves every chunk
+    executor = worker_pool(workers) if workers > 1 else None
+
+    def rekey_list(ciphers, mode):
+        return _rekey_list(executor, workers, ciphers, mode, old_key, new_key, version)
+
+    done, output = _resume(job, checkpoint_path, partial_path)
+    resumed = done
+    try:
+        if table:
+            chunks = _rekey_table(source, done, chunk_size, rekey_list, columns, modes, headers)
+        else:
+            chunks = _rekey_lines(source, done, chunk_size, rekey_list)
+
+        # Output is flushed to disk before the checkpoint that covers it is saved
+        for data, records in chunks:
+            output.write(data)
+            output.flush()
+            os.fsync(output.fileno())
+            done += records
+            _save_checkpoint(checkpoint_path, {'job': job, 'records': done, 'bytes': output.tell()})
+    finally:
+        output.close()
+        if executor is not None:
+            executor.shutdown()
+
+    # The schema record is unchanged by a rekey (same columns, dtypes and modes)
+    if table and entries and destination != source:
+        with open(destination + SCHEMA_SUFFIX, 'w') as schema_file:
+            json.dump({'columns': list(entries.values())}, schema_file)
+
+    try:
+        os.chmod(partial_path, os.stat(source).st_mode & 0o7777)
+    except FileNotFoundError:
+        pass
+    os.replace(partial_path, destination)
+    if os.path.exists(checkpoint_path):  # no checkpoint is saved for an empty file
+        os.remove(checkpoint_path)
+
+    return done - resumed
@@ -1,50 +1,223 @@
-import pandas as pd
+"""Functions for encrypting and decrypting tabular data (CSV and Excel files, Pandas Dataframes)."""
 
-from DRE_94 import encrypt, decrypt
+
+import json
+
+from collections import OrderedDict
+from DRE_94 import encrypt, decrypt, encrypt_numeric, decrypt_numeric
 from implicit import key_error_check, arg_check
 
+SUPPORTED_TYPES = ['CSV', 'Excel']
 
-# Currently only supports CSV and Excel files
-def encrypt_tabular_data(data_source, key, cols=(0, None), rows=(0, None), save_as=None, inplace=False):
-    """Encrypts a tabular file using a DRE.94 key, allowing user to specify which portion of the data to be encrypted.
-    Allows user the option to save the encrypted data to a file. Currently only supports CSV and Excel files."""
+# Key under which the schema record is kept in Dataframe.attrs, and suffix of the schema sidecar file
+SCHEMA_ATTR = 'DRE_94_schema'
+SCHEMA_SUFFIX = '.schema.json'
 
-    arg_check(inplace, 'inplace', bool)
-    key_error_check(key)
+# Default number of characters (ciphers and decrypted values) held by the cell cache of a DecryptedView
+CACHE_SIZE = 1 << 24
+
+
+# Pandas is imported when tabular functions are first used rather than upon importing the module
+# (after the first call, the import statement is only a lookup in sys.modules)
+def _pandas():
+    import pandas
+    return pandas
+
+
+# Gets the file extension of a path/filename; 'argname' is only used for the error message
+def _file_ext(file, argname):
+    reverse = file[::-1]
+    try:
+        return reverse[:reverse.index('.')][::-1]
+    except ValueError as e:
+        msg = f"no file extension detected in {argname}: {file}"
+        e.args = (msg,)
+        raise
+
+
+def read_tabular(file, converters=None, usecols=None, nrows=None):
+    """Reads a CSV or Excel file into a Pandas Dataframe; 'converters' maps column names to functions applied to raw
+    cells, 'usecols' (if given) selects the columns to read and 'nrows' (if given) the number of rows to read."""
+
+    ext = _file_ext(file, "given file path 'file'")
+
+    # Select correct Pandas read method
+    if ext == 'csv':
+        read = _pandas().read_csv
+    elif ext[:2] == 'xl':
+        read = _pandas().read_excel
+    else:
+        msg = f'unrecognized file type (supported file types are {", ".join(SUPPORTED_TYPES)})'
+        raise ValueError(msg)
+
+    return read(file, converters=converters, usecols=usecols, nrows=nrows)
+
+
+# Saves a Pandas Dataframe to a CSV or Excel file (without index), along with its schema sidecar if it has one
+def _save_tabular(dataframe, save_as):
+    if type(save_as) != str:
+        msg = f"keyword argument 'save_as' must be a path or filename with appropriate file extension"
+        raise TypeError(msg)
+
+    save_as_ext = _file_ext(save_as, "'save_as'")
+
+    # Select save method based on 'save_as' file extension
+    if save_as_ext == 'csv':
+        dataframe.to_csv(save_as, index=False)  # exclude index
+    elif save_as_ext[:2] == 'xl':
+        dataframe.to_excel(save_as, index=False)  # exclude index
+    else:
+        msg = f'unrecognized \'save_as\' file type (supported file types are {", ".join(SUPPORTED_TYPES)})'
+        raise ValueError(msg)
 
-    supported_types = ['CSV', 'Excel']
+    schema = dataframe.attrs.get(SCHEMA_ATTR)
+    if schema is not None:
+        with open(save_as + SCHEMA_SUFFIX, 'w') as schema_file:
+            json.dump(schema, schema_file)
 
+
+# Gets the Dataframe to operate on; a copy is made unless 'inplace' is set (a shallow copy suffices when only
+# whole columns are replaced, so the columns that are left untouched are never copied)
+def _get_dataframe(data_source, inplace, shallow=False, converters=None):
     # If data_source is a filename/path, read Dataframe from file
     if type(data_source) == str:
-        file = data_source
+        return read_tabular(data_source, converters)
+
+    # Else, expect data_source to be a Pandas Dataframe
+    if inplace:
+        return data_source
+    return data_source.copy(deep=not shallow)
+
+
+def select_columns(columns, available):
+    """Returns the column selector 'columns' (a column name or a list of them) as a list, after checking that every
+    column is among the 'available' column names (raises KeyError otherwise)."""
+
+    if isinstance(columns, str):
+        columns = [columns]
+
+    columns = list(columns)
+    missing = [col for col in columns if col not in available]
+    if missing:
+        msg = f'column(s) not found in tabular data: {", ".join(map(str, missing))}'
+        raise KeyError(msg)
+
+    return columns
+
+
+# Checks the 'columns' selector and that positional bounds were not passed alongside it
+def _check_columns(dataframe, columns, cols, rows):
+    if tuple(cols) != (0, None) or tuple(rows) != (0, None):
+        msg = "keyword argument 'columns' cannot be combined with 'cols' or 'rows'"
+        raise ValueError(msg)
+
+    return select_columns(columns, dataframe.columns)
 
-        # Get file extension
-        reverse = file[::-1]
+
+def load_schema(data_source, dataframe, schema):
+    """Loads the schema record of an encrypted Dataframe ('schema' if given, else the Dataframe's attrs, else the
+    sidecar file of data_source) and returns its entries by column name (empty if there is none)."""
+
+    if schema is None:
+        schema = dataframe.attrs.get(SCHEMA_ATTR)
+
+    if schema is None and type(data_source) == str:
         try:
-            ext = reverse[:reverse.index('.')][::-1]
-        except ValueError as e:
-            msg = f"no file extension detected in given file path 'file': {file}"
-            e.args = (msg,)
-            raise
-
-        # Select correct Pandas read method
-        if ext == 'csv':
-            read = pd.read_csv
-        elif ext[:2] == 'xl':
-            read = pd.read_excel
+            with open(data_source + SCHEMA_SUFFIX) as schema_file:
+                schema = json.load(schema_file)
+        except FileNotFoundError:
+            pass
+
+    if schema is None:
+        return {}
+
+    return {entry['name']: entry for entry in schema['columns']}
+
+
+# Converts a column of decrypted strings back to its original dtype
+def _restore_dtype(series, dtype):
+    if dtype == 'object':
+        return series
+
+    # str(True) and str(False) are both non-empty, so bool must be mapped rather than cast
+    if dtype == 'bool':
+        return series.map({'True': True, 'False': False})
+
+    return series.astype(dtype)
+
+
+# Checks if a column holds plain integers or floats (NumPy dtypes only; nullable extension dtypes may hold NA)
+def _is_numeric_column(series):
+    return series.dtype.kind in 'iuf' and not _pandas().api.types.is_extension_array_dtype(series.dtype)
+
+
+# Encrypts whole columns selected by name, recording their original dtypes (and cipher mode) in the schema record
+def _encrypt_columns(dataframe, key, columns, numeric=False):
+    schema = {'columns': list(dataframe.attrs.get(SCHEMA_ATTR, {'columns': []})['columns'])}
+    encrypted = {entry['name'] for entry in schema['columns']}
+
+    for col in columns:
+        # Numeric columns skip the str() round trip and the charset tag of the general cipher
+        mode = 'numeric' if numeric and _is_numeric_column(dataframe[col]) else 'text'
+
+        if col not in encrypted:
+            schema['columns'].append({'name': col, 'dtype': str(dataframe[col].dtype), 'mode': mode})
+
+        if mode == 'numeric':
+            dataframe[col] = dataframe[col].map(lambda cell: encrypt_numeric(cell, key)).astype(object)
         else:
-            msg = f'unrecognized file type (supported file types are {", ".join(supported_types)})'
-            raise ValueError(msg)
+            dataframe[col] = dataframe[col].map(lambda cell: encrypt(str(cell), key)).astype(object)
 
-        # Get Dataframe to be encrypted
-        dataframe = read(file)
+    dataframe.attrs[SCHEMA_ATTR] = schema
 
-    # Else, expect data_source to be a Pandas Dataframe
-    else:
-        if inplace:
-            dataframe = data_source
+
+# Decrypts whole columns selected by name, restoring the original dtypes found in the schema record
+def _decrypt_columns(dataframe, key, columns, schema):
+    for col in columns:
+        entry = schema.get(col)
+
+        if entry is not None and entry.get('mode') == 'numeric':
+            decrypted = dataframe[col].map(lambda cell: decrypt_numeric(str(cell), key)).astype(object)
         else:
-            dataframe = data_source.copy()
+            decrypted = dataframe[col].map(lambda cell: decrypt(str(cell), key)).astype(object)
+
+        if entry is not None:
+            decrypted = _restore_dtype(decrypted, entry['dtype'])
+
+        dataframe[col] = decrypted
+
+    # Decrypted columns no longer belong in the schema record of the encrypted Dataframe
+    remaining = [entry for name, entry in schema.items() if name not in columns]
+    if remaining:
+        dataframe.attrs[SCHEMA_ATTR] = {'columns': remaining}
+    else:
+        dataframe.attrs.pop(SCHEMA_ATTR, None)
+
+
+# Currently only supports CSV and Excel files
+def encrypt_tabular_data(data_source, key, cols=(0, None), rows=(0, None), save_as=None, inplace=False,
+                         columns=None, numeric=False):
+    """Encrypts a tabular file using a DRE.94 key, allowing user to specify which portion of the data to be encrypted.
+    Allows user the option to save the encrypted data to a file. Currently only supports CSV and Excel files.
+    Alternatively, whole columns can be selected by name with 'columns'; their original dtypes are then recorded
+    in a schema record (saved as a sidecar file next to 'save_as') so that decryption can restore them. With
+    'numeric' set, selected integer and float columns are encrypted in numeric mode (see encrypt_numeric)."""
+
+    arg_check(inplace, 'inplace', bool)
+    arg_check(numeric, 'numeric', bool)
+    key_error_check(key)
+
+    dataframe = _get_dataframe(data_source, inplace, shallow=columns is not None)
+
+    # Selecting columns by name only touches those columns (column names are left unencrypted)
+    if columns is not None:
+        columns = _check_columns(dataframe, columns, cols, rows)
+        _encrypt_columns(dataframe, key, columns, numeric)
+
+        if save_as is not None:
+            _save_tabular(dataframe, save_as)
+
+        return dataframe
 
     # Due to how Pandas works, must include column names as data if they ever should be encrypted
     dataframe.loc[-1] = dataframe.columns  # add row for column names
@@ -81,72 +254,38 @@ def encrypt_tabular_data(data_source, key, cols=(0, None), rows=(0, None), save_
 
     # If a save-as filename/path is given, save the encrypted Dataframe
     if save_as is not None:
-        if type(save_as) != str:
-            msg = f"keyword argument 'save_as' must be a path or filename with appropriate file extension"
-            raise TypeError(msg)
-
-        # Get 'save_as' file extension
-        save_as_reverse = save_as[::-1]
-        try:
-            save_as_ext = save_as_reverse[:save_as_reverse.index('.')][::-1]
-        except ValueError as e:
-            msg = f"no file extension detected in 'save_as': {save_as}"
-            e.args = (msg,)
-            raise
-
-        # Select save method based on 'save_as' file extension
-        if save_as_ext == 'csv':
-            dataframe.to_csv(save_as, index=False)  # exclude index
-        elif save_as_ext[:2] == 'xl':
-            dataframe.to_excel(save_as, index=False)  # exclude index
-        else:
-            msg = f'unrecognized \'save_as\' file type (supported file types are {", ".join(supported_types)})'
-            raise ValueError(msg)
+        _save_tabular(dataframe, save_as)
 
     return dataframe
 
 
 # Currently only supports CSV and Excel files
-def decrypt_tabular_data(data_source, key, cols=(0, None), rows=(0, None), save_as=None, inplace=False):
+def decrypt_tabular_data(data_source, key, cols=(0, None), rows=(0, None), save_as=None, inplace=False,
+                         columns=None, schema=None):
     """Decrypts a tabular file using a DRE.94 key, allowing user to specify which portion of the data to be decrypted.
-    Allows user the option to save the decrypted data to a file. Currently only supports CSV and Excel files."""
+    Allows user the option to save the decrypted data to a file. Currently only supports CSV and Excel files.
+    Columns encrypted by name are decrypted by passing the same 'columns'; their original dtypes are restored
+    from 'schema' if given, else from the Dataframe's attrs or the sidecar file next to 'data_source'."""
 
     arg_check(inplace, 'inplace', bool)
     key_error_check(key)
 
-    supported_types = ['CSV', 'Excel']
+    # Ciphers such as '1e5' or 'NA' must be read as raw text, not parsed as numbers or missing values
+    converters = None
+    if columns is not None:
+        converters = {col: str for col in ([columns] if isinstance(columns, str) else columns)}
 
-    # If data_source is a filename/path, read Dataframe from file
-    if type(data_source) == str:
-        file = data_source
+    dataframe = _get_dataframe(data_source, inplace, shallow=columns is not None, converters=converters)
 
-        # Get file extension
-        reverse = file[::-1]
-        try:
-            ext = reverse[:reverse.index('.')][::-1]
-        except ValueError as e:
-            msg = f"no file extension detected in given file path 'file': {file}"
-            e.args = (msg,)
-            raise
-
-        # Select correct Pandas read method
-        if ext == 'csv':
-            read = pd.read_csv
-        elif ext[:2] == 'xl':
-            read = pd.read_excel
-        else:
-            msg = f'unrecognized file type (supported file types are {", ".join(supported_types)})'
-            raise ValueError(msg)
+    # Selecting columns by name only touches those columns (column names were left unencrypted)
+    if columns is not None:
+        columns = _check_columns(dataframe, columns, cols, rows)
+        _decrypt_columns(dataframe, key, columns, load_schema(data_source, dataframe, schema))
 
-        # Get Dataframe to be decrypted
-        dataframe = read(file)
+        if save_as is not None:
+            _save_tabular(dataframe, save_as)
 
-    # Else, expect data_source to be a Pandas Dataframe
-    else:
-        if inplace:
-            dataframe = data_source
-        else:
-            dataframe = data_source.copy()
+        return dataframe
 
     # Due to how Pandas works, must include column names as data in case they were encrypted
     dataframe.loc[-1] = dataframe.columns  # add row for column names
@@ -183,26 +322,180 @@ def decrypt_tabular_data(data_source, key, cols=(0, None), rows=(0, None), save_
 
     # If a save-as filename/path is given, save the decrypted Dataframe
     if save_as is not None:
-        if type(save_as) != str:
-            msg = f"keyword argument 'save_as' must be a path or filename with appropriate file extension"
-            raise TypeError(msg)
+        _save_tabular(dataframe, save_as)
 
-        # Get 'save_as' file extension
-        save_as_reverse = save_as[::-1]
-        try:
-            save_as_ext = save_as_reverse[:save_as_reverse.index('.')][::-1]
-        except ValueError as e:
-            msg = f"no file extension detected in 'save_as': {save_as}"
-            e.args = (msg,)
-            raise
-
-        # Select save method based on 'save_as' file extension
-        if save_as_ext == 'csv':
-            dataframe.to_csv(save_as, index=False)  # exclude index
-        elif save_as_ext[:2] == 'xl':
-            dataframe.to_excel(save_as, index=False)  # exclude index
+    return dataframe
+
+
+# Cache of decrypted cells shared by a DecryptedView and the views derived from it; keyed by cipher (and mode), since
+# equal ciphers decrypt to equal values, and bounded by the number of characters held (least recently used first out)
+class _CellCache:
+    def __init__(self, key, size):
+        self.key = key
+        self.size = size
+        self.held = 0
+        self._cells = OrderedDict()
+
+    def decrypt(self, cipher, mode):
+        cell = (mode, cipher)
+        if cell in self._cells:
+            self._cells.move_to_end(cell)
+            return self._cells[cell]
+
+        value = decrypt_numeric(cipher, self.key) if mode == 'numeric' else decrypt(cipher, self.key)
+
+        self._cells[cell] = value
+        self.held += len(cipher) + len(str(value))
+        while self.held > self.size and self._cells:
+            (_, old_cipher), old_value = self._cells.popitem(last=False)
+            self.held -= len(old_cipher) + len(str(old_value))
+
+        return value
+
+
+class DecryptedView:
+    """Read-only view of an encrypted CSV/Excel file or Pandas Dataframe that decrypts cells only when they are
+    accessed, keeping decrypted cells in a cache of at most 'cache_size' characters. The encrypted columns are
+    'columns' if given, else those of the schema record ('schema' if given, else the Dataframe's attrs or the sidecar
+    file of data_source), else every column; 'headers' tells whether column names are encrypted too (default: only
+    when there is no schema record and 'columns' is not given, as with positional encrypt_tabular_data). Columns are
+    always referred to by their decrypted names.
+
+    view.head(n) and view.rows(start, stop) only read (and decrypt) the rows they return; view[name] decrypts a
+    column, view[mask] returns a view of the rows where a boolean mask (e.g. view['age'] > 30) is true, and
+    view.materialize() decrypts everything into a normal Dataframe."""
+
+    def __init__(self, data_source, key, columns=None, schema=None, headers=None, cache_size=CACHE_SIZE):
+        key_error_check(key)
+        arg_check(cache_size, 'cache_size', int)
+
+        if type(data_source) == str:
+            self._source = data_source
+            self._frame = None
+            stored = read_tabular(data_source, nrows=0)  # column names only
         else:
-            msg = f'unrecognized \'save_as\' file type (supported file types are {", ".join(supported_types)})'
-            raise ValueError(msg)
+            self._source = None
+            self._frame = data_source
+            stored = data_source
+
+        entries = load_schema(data_source, stored, schema)
+        if headers is None:
+            headers = not entries and columns is None
+        arg_check(headers, 'headers', bool)
+
+        self._cache = _CellCache(key, cache_size)
+
+        # Decrypted column name -> stored column name
+        self._names = {}
+        for name in stored.columns:
+            self._names[decrypt(str(name), key) if headers else name] = name
+
+        if columns is None:
+            columns = [name for name in self._names if name in entries] if entries else list(self._names)
+        columns = select_columns(columns, self._names)
+
+        # Decrypted column name -> (cipher mode, original dtype or None) of each encrypted column
+        self._encrypted = {}
+        for col in columns:
+            entry = entries.get(self._names[col], {})
+            self._encrypted[col] = (entry.get('mode', 'text'), entry.get('dtype'))
+
+        # Ciphers such as '1e5' or 'NA' must be read as raw text, not parsed as numbers or missing values
+        self._converters = {self._names[col]: str for col in self._encrypted}
+
+    @property
+    def columns(self):
+        """Decrypted column names."""
+
+        return list(self._names)
+
+    def __len__(self):
+        return len(self._encrypted_frame())
+
+    # Returns the whole encrypted Dataframe, reading the file on first use
+    def _encrypted_frame(self):
+        if self._frame is None:
+            self._frame = read_tabular(self._source, self._converters)
+        return self._frame
+
+    # Returns rows start to stop (exclusive) of the encrypted Dataframe, only reading up to row 'stop' of the file
+    # unless the whole file was already read
+    def _encrypted_rows(self, start, stop):
+        if self._frame is None and stop is not None and stop >= 0:
+            return read_tabular(self._source, self._converters, nrows=stop).iloc[start:stop]
+        return self._encrypted_frame().iloc[start:stop]
+
+    # Decrypts one encrypted column (a Series of ciphers), restoring its original dtype if known
+    def _decrypt_series(self, series, col):
+        mode, dtype = self._encrypted[col]
+        decrypted = series.map(lambda cell: self._cache.decrypt(str(cell), mode)).astype(object)
+        if dtype is not None:
+            decrypted = _restore_dtype(decrypted, dtype)
+        return decrypted.rename(col)
+
+    # Decrypts part of the encrypted Dataframe (the index is kept, so that rows can still be matched up)
+    def _decrypt_frame(self, part, columns=None):
+        columns = self.columns if columns is None else columns
+        decrypted = {}
+        for col in columns:
+            series = part[self._names[col]]
+            decrypted[col] = self._decrypt_series(series, col) if col in self._encrypted else series.rename(col)
+        return _pandas().DataFrame(decrypted, index=part.index, columns=columns)
+
+    def head(self, n=5):
+        """Returns the first n rows, decrypted (for files, only these rows are read)."""
+
+        return self.rows(0, n)
+
+    def rows(self, start=0, stop=None):
+        """Returns rows start to stop (exclusive, by position), decrypted."""
+
+        return self._decrypt_frame(self._encrypted_rows(start, stop))
+
+    def row(self, i):
+        """Returns row i (by position), decrypted, as a Pandas Series."""
+
+        if i < 0:
+            i += len(self)
+        return self.rows(i, i + 1).iloc[0]
+
+    def cell(self, i, column):
+        """Returns the decrypted cell of row i (by position) in the given column."""
+
+        if i < 0:
+            i += len(self)
+        return self.column(column, i, i + 1).iloc[0]
+
+    def column(self, name, start=0, stop=None):
+        """Returns rows start to stop (exclusive, by position) of a column, decrypted, as a Pandas Series."""
+
+        if name not in self._names:
+            msg = f'column not found in tabular data: {name}'
+            raise KeyError(msg)
+
+        series = self._encrypted_rows(start, stop)[self._names[name]]
+        return self._decrypt_series(series, name) if name in self._encrypted else series.rename(name)
 
-    return dataframe
+    def __getitem__(self, item):
+        # Column name (masks and lists are unhashable)
+        try:
+            if item in self._names:
+                return self.column(item)
+        except TypeError:
+            pass
+
+        # List of column names
+        if isinstance(item, list) and all(not isinstance(col, bool) and col in self._names for col in item):
+            return self._decrypt_frame(self._encrypted_frame(), item)
+
+        # Boolean mask: a new view of the matching rows (still encrypted), sharing this view's cache
+        view = object.__new__(DecryptedView)
+        view.__dict__.update(self.__dict__)
+        view._source = None
+        view._frame = self._encrypted_frame()[item]
+        return view
+
+    def materialize(self):
+        """Returns the whole view as a normal Pandas Dataframe, decrypted."""
+
+        return self._decrypt_frame(self._encrypted_frame())